@@ -0,0 +1,212 @@
+""" Benchmark poll cycles against simulated Swegon CASA units.
+
+Measures wall time per cycle, Modbus transactions and bytes per cycle, decode time
+per register and the longest event loop stall, for fleets of units. Results are
+written as JSON so releases can be compared.
+
+    python benchmarks/poll_cycle.py --fleets 1 10 50 200 --output results.json
+
+With --coordinator the cycles are run through SwegonCoordinator._async_update_data,
+which needs Home Assistant to be installed.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.simulator import SwegonSimulator
+from custom_components.swegon.pyswegon.swegon import Swegon
+from custom_components.swegon.pyswegon.swegon import COMMANDS,SETPOINTS,ALARMS,SENSORS,SENSORS2,UNIT_STATUSES
+
+MANIFEST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "custom_components", "swegon", "manifest.json")
+
+# Groups read in a full poll cycle
+CYCLE_GROUPS = (ALARMS, SENSORS, SENSORS2, COMMANDS, UNIT_STATUSES, SETPOINTS)
+
+class LoopMonitor:
+    """ Measures how late the event loop wakes up a task sleeping in short intervals """
+    def __init__(self, interval:float = 0.001):
+        self._interval = interval
+        self._task = None
+        self.MaxStall = 0.0
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self._interval)
+            self.MaxStall = max(self.MaxStall, time.perf_counter() - start - self._interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+class SwegonRunner:
+    """ Polls units directly through the pyswegon API """
+    def __init__(self, model, host, port, slave_id, pipeline_depth=1):
+        self.Device = Swegon(model, host, port, slave_id, pipeline_depth=pipeline_depth)
+
+    async def setup(self):
+        await self.Device.readDeviceInfo()
+
+    async def cycle(self):
+        await self.Device.readGroups(*CYCLE_GROUPS)
+
+    def close(self):
+        self.Device.close()
+
+class CoordinatorRunner:
+    """ Polls units through the coordinator, with every group in CYCLE_GROUPS due in each cycle """
+    def __init__(self, hass, model, host, port, slave_id, pipeline_depth=1, fleet=None):
+        from custom_components.swegon.coordinator import SwegonCoordinator
+
+        device = types.SimpleNamespace(id="benchmark-{}-{}".format(port, slave_id), name="Benchmark {}".format(slave_id), identifiers=set())
+        self.Coordinator = SwegonCoordinator(hass, device, model, host, port, slave_id, 60, 5, 30, pipeline_depth, fleet=fleet)
+        self.Device = self.Coordinator._swegonDevice
+
+    async def setup(self):
+        # Read device info up front, the device registry is not loaded here
+        await self.Device.readDeviceInfo()
+
+        # There are no entities here, so read the groups as if all entities were enabled
+        for group in CYCLE_GROUPS:
+            self.Coordinator.async_add_demand(group, None)
+
+    async def cycle(self):
+        for task in self.Coordinator._scheduler.tasks:
+            if all(group in CYCLE_GROUPS for group in task.Groups):
+                task.NextPoll = 0
+        await self.Coordinator._async_update_data()
+
+    def close(self):
+        self.Coordinator.close()
+
+def summarize(values):
+    values = sorted(values)
+    return {
+        "mean": statistics.fmean(values),
+        "p50": values[len(values) // 2],
+        "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+        "max": values[-1],
+    }
+
+async def run_fleet(args, units:int, hass=None) -> dict:
+    # Spread units over the gateways, max 247 slave ids per gateway
+    gateways = max(args.gateways, -(-units // 247))
+    simulators = []
+    runners = []
+    fleet = None
+    if hass is not None and args.fleet:
+        from custom_components.swegon.fleet import FleetScheduler
+        fleet = FleetScheduler(hass, args.fleet, 300)
+    for gateway in range(gateways):
+        slave_ids = list(range(1, units + 1))[gateway::gateways]
+        simulator = SwegonSimulator(args.model, "127.0.0.1", 0, slave_ids, args.latency, args.jitter, seed=gateway)
+        await simulator.start()
+        simulators.append(simulator)
+        for slave_id in slave_ids:
+            if hass is not None:
+                runners.append(CoordinatorRunner(hass, args.model, "127.0.0.1", simulator.Port, slave_id, args.pipeline, fleet))
+            else:
+                runners.append(SwegonRunner(args.model, "127.0.0.1", simulator.Port, slave_id, args.pipeline))
+
+    await asyncio.gather(*(runner.setup() for runner in runners))
+    for runner in runners:
+        runner.Device.Stats.DecodeTime = 0.0
+        runner.Device.Stats.DecodedRegisters = 0
+    requests = sum(simulator.Requests for simulator in simulators)
+    traffic = sum(simulator.BytesIn + simulator.BytesOut for simulator in simulators)
+
+    monitor = LoopMonitor()
+    monitor.start()
+    cycle_times = []
+    for _ in range(args.cycles):
+        start = time.perf_counter()
+        await asyncio.gather(*(runner.cycle() for runner in runners))
+        cycle_times.append(time.perf_counter() - start)
+    await monitor.stop()
+
+    requests = sum(simulator.Requests for simulator in simulators) - requests
+    traffic = sum(simulator.BytesIn + simulator.BytesOut for simulator in simulators) - traffic
+    decode_time = sum(runner.Device.Stats.DecodeTime for runner in runners)
+    decoded = sum(runner.Device.Stats.DecodedRegisters for runner in runners)
+
+    for runner in runners:
+        runner.close()
+    for simulator in simulators:
+        await simulator.stop()
+
+    result = {
+        "mode": "coordinator" if hass is not None else "swegon",
+        "units": units,
+        "gateways": gateways,
+        "cycles": args.cycles,
+        "cycle_time_s": summarize(cycle_times),
+        "transactions_per_cycle": requests / args.cycles,
+        "transactions_per_unit_cycle": requests / args.cycles / units,
+        "bytes_per_cycle": traffic / args.cycles,
+        "decode_time_per_register_us": decode_time / decoded * 1e6 if decoded else 0,
+        "max_loop_stall_ms": monitor.MaxStall * 1000,
+    }
+    if fleet is not None:
+        result["fleet"] = fleet.asDict()
+    return result
+
+async def main(args):
+    hass = None
+    if args.coordinator:
+        from homeassistant.core import HomeAssistant
+        hass = HomeAssistant(tempfile.mkdtemp())
+
+    with open(MANIFEST) as manifest:
+        version = json.load(manifest)["version"]
+
+    results = []
+    for units in args.fleets:
+        result = await run_fleet(args, units, hass)
+        results.append(result)
+        print("{:>4} units: {:.1f} ms/cycle, {:.1f} transactions/cycle, max stall {:.1f} ms".format(
+            units, result["cycle_time_s"]["mean"] * 1000, result["transactions_per_cycle"], result["max_loop_stall_ms"]), file=sys.stderr)
+
+    report = {
+        "version": version,
+        "python": platform.python_version(),
+        "model": args.model,
+        "latency_s": args.latency,
+        "jitter_s": args.jitter,
+        "pipeline_depth": args.pipeline,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as file:
+            file.write(output)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark Swegon poll cycles against simulated units")
+    parser.add_argument("--fleets", type=int, nargs="+", default=[1, 10, 50, 200], help="Number of units to poll")
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--gateways", type=int, default=1, help="Number of simulated Modbus gateways")
+    parser.add_argument("--model", default="CASA R4")
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--pipeline", type=int, default=1, help="Requests in flight per gateway, 1 sends one at a time")
+    parser.add_argument("--coordinator", action="store_true", help="Poll through SwegonCoordinator (needs Home Assistant)")
+    parser.add_argument("--fleet", type=int, default=0, help="With --coordinator, poll at most this many units at once through the fleet scheduler")
+    parser.add_argument("--output", help="Write JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
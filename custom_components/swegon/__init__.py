@@ -1,12 +1,16 @@
 """Support for Swegon CASA over Modbus TCP/IP."""
 import logging
 import async_timeout
+import voluptuous as vol
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers.device_registry import DeviceEntry
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import device_registry as dr
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.storage import Store
 
 from homeassistant.const import CONF_DEVICES
 from .const import (
@@ -19,12 +23,49 @@ from .const import (
     CONF_SLAVE_ID,
     CONF_SCAN_INTERVAL,
     CONF_SCAN_INTERVAL_FAST,
-    DEVICE_CASA_R4
+    CONF_SCAN_INTERVAL_ALARMS,
+    CONF_PIPELINE_DEPTH,
+    CONF_STATISTICS_WINDOW,
+    DEFAULT_SCAN_INTERVAL_ALARMS,
+    DEFAULT_PIPELINE_DEPTH,
+    DEFAULT_STATISTICS_WINDOW,
+    STORAGE_VERSION,
+    DEVICE_CASA_R4,
+    SERVICE_DUMP_SAMPLES,
+    DATA_FLEET,
+    FLEET_MAX_POLLS,
+    FLEET_RATE_WINDOW
 )
 from .coordinator import SwegonCoordinator
+from .fleet import FleetScheduler
+from .pyswegon.swegon import get_register_map
 
 _LOGGER = logging.getLogger(__name__)
 
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+DUMP_SAMPLES_SCHEMA = vol.Schema(
+    {
+        vol.Required("device_id"): cv.string,
+        vol.Optional("keys"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("seconds"): vol.All(vol.Coerce(float), vol.Range(min=0)),
+    }
+)
+
+async def async_setup(hass: HomeAssistant, config) -> bool:
+    """Set up the fleet scheduler and services shared by all Swegon entries."""
+    hass.data[DATA_FLEET] = FleetScheduler(hass, FLEET_MAX_POLLS, FLEET_RATE_WINDOW)
+
+    async def async_dump_samples(call: ServiceCall) -> ServiceResponse:
+        # Full resolution values kept in memory, not the values sent to the recorder
+        for coordinator in hass.data.get(DOMAIN, {}).values():
+            if coordinator.device_id == call.data["device_id"]:
+                return {"samples": coordinator.get_samples(call.data.get("keys"), call.data.get("seconds"))}
+        raise ServiceValidationError("No Swegon unit with device id {}".format(call.data["device_id"]))
+
+    hass.services.async_register(DOMAIN, SERVICE_DUMP_SAMPLES, async_dump_samples, schema=DUMP_SAMPLES_SCHEMA, supports_response=SupportsResponse.ONLY)
+    return True
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Set up platform from a ConfigEntry."""
     _LOGGER.debug("Setting up configuration for Swegon CASA!")
@@ -38,6 +79,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     slave_id = entry.data[CONF_SLAVE_ID]
     scan_interval = entry.data[CONF_SCAN_INTERVAL]
     scan_interval_fast = entry.data[CONF_SCAN_INTERVAL_FAST]
+    scan_interval_alarms = entry.data.get(CONF_SCAN_INTERVAL_ALARMS, DEFAULT_SCAN_INTERVAL_ALARMS)
+    pipeline_depth = entry.data.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH)
+    statistics_window = entry.data.get(CONF_STATISTICS_WINDOW, DEFAULT_STATISTICS_WINDOW)
 
     # Create device
     # Each config entry will have only one device, so we use the entry_id as a
@@ -50,9 +94,15 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         name=name
     )
 
+    # Compile the register map outside the event loop
+    await hass.async_add_executor_job(get_register_map, device_model)
+
     # Set up coordinator
-    coordinator = SwegonCoordinator(hass, dev, device_model, ip, port, slave_id,scan_interval, scan_interval_fast)
+    coordinator = SwegonCoordinator(hass, dev, device_model, ip, port, slave_id,scan_interval, scan_interval_fast, scan_interval_alarms, pipeline_depth, statistics_window, hass.data[DATA_FLEET])
     hass.data[DOMAIN][entry.entry_id] = coordinator
+
+    # Restore values from last run, so entities have state before the first poll
+    await coordinator.async_restore(get_store(hass, entry))
     
     # Forward the setup to the platforms.
     hass.async_create_task(
@@ -64,6 +114,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     
     return True
 
+def get_store(hass: HomeAssistant, entry: ConfigEntry) -> Store:
+    return Store(hass, STORAGE_VERSION, "{}.{}".format(DOMAIN, entry.entry_id))
+
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry):
     _LOGGER.debug("Updating Swegon entry!")
     await hass.config_entries.async_reload(entry.entry_id)
@@ -76,10 +129,16 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await coordinator.async_save()
+        coordinator.close()
 
     return unload_ok
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove stored values when the entry is deleted."""
+    await get_store(hass, entry).async_remove()
+
 async def async_remove_config_entry_device(
     hass: HomeAssistant, config_entry: ConfigEntry, device_entry: DeviceEntry
 ) -> bool:
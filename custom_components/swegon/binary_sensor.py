@@ -2,6 +2,7 @@ import logging
 
 from collections import namedtuple
 from homeassistant.components.binary_sensor import BinarySensorDeviceClass, BinarySensorEntity
+from homeassistant.core import callback
 from homeassistant.helpers.entity import EntityCategory
 
 from .const import DOMAIN, CONF_IP
@@ -37,23 +38,25 @@ class SwegonBinarySensorEntity(SwegonBaseEntity, BinarySensorEntity):
     """Representation of a Sensor."""
 
     def __init__(self, coordinator, swegonentity):
-        super().__init__(coordinator, swegonentity)
+        # Attributes show all alarms, so we update on any change in the group
+        super().__init__(coordinator, swegonentity, (swegonentity.group, None))
 
         """Sensor Entity properties"""
         self._attr_device_class = swegonentity.data_type.deviceClass
 
-    @property
-    def extra_state_attributes(self):
-        """Return entity specific state attributes."""
-        attrs = {}
-        alarms = self.coordinator._swegonDevice.Datapoints["Alarms"]
-        for (dataPointName, data) in alarms.items():
-            if data.Value:
-                newAttr = {dataPointName:"ALARM"}
-                attrs.update(newAttr)
-        return attrs
-        
+        """Alarms shown as attributes, rebuilt only when the group changes"""
+        self._alarms = [(key, coordinator.get_accessor(self._group, key)) for key in coordinator.get_keys(self._group)]
+        self._extra_state_attributes = self._build_attributes()
+
+    def _build_attributes(self) -> dict:
+        return {key: "ALARM" for key, value in self._alarms if value()}
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        self._extra_state_attributes = self._build_attributes()
+        super()._handle_coordinator_update()
+
     @property
     def is_on(self):
         """Return the state of the switch."""
-        return self.coordinator.get_value(self._group, self._key)
+        return self._value()
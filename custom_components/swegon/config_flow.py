@@ -12,9 +12,10 @@ from homeassistant.helpers import selector
 from typing import Any
 
 from homeassistant.const import CONF_DEVICES
-from .const import DOMAIN, CONF_NAME, CONF_DEVICE_MODEL, CONF_IP, CONF_PORT, CONF_SLAVE_ID, CONF_SCAN_INTERVAL, CONF_SCAN_INTERVAL_FAST
-from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_FAST
-from .const import DEVICE_CASA_R4, DEVICE_CASA_R15
+from .const import DOMAIN, CONF_NAME, CONF_DEVICE_MODEL, CONF_IP, CONF_PORT, CONF_SLAVE_ID, CONF_SCAN_INTERVAL, CONF_SCAN_INTERVAL_FAST, CONF_SCAN_INTERVAL_ALARMS, CONF_PIPELINE_DEPTH, CONF_STATISTICS_WINDOW
+from .const import DEFAULT_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL_FAST, DEFAULT_SCAN_INTERVAL_ALARMS, DEFAULT_PIPELINE_DEPTH, DEFAULT_STATISTICS_WINDOW
+from .const import DEVICE_CASA_R4
+from .pyswegon.swegon import list_models
 
 CONFIG_ENTRY_NAME = "Swegon"
 
@@ -25,7 +26,10 @@ DEVICE_DATA = {
     CONF_PORT: 502,
     CONF_SLAVE_ID: 1,
     CONF_SCAN_INTERVAL: DEFAULT_SCAN_INTERVAL,
-    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST
+    CONF_SCAN_INTERVAL_FAST: DEFAULT_SCAN_INTERVAL_FAST,
+    CONF_SCAN_INTERVAL_ALARMS: DEFAULT_SCAN_INTERVAL_ALARMS,
+    CONF_PIPELINE_DEPTH: DEFAULT_PIPELINE_DEPTH,
+    CONF_STATISTICS_WINDOW: DEFAULT_STATISTICS_WINDOW
 }
 
 _LOGGER = logging.getLogger(__name__)
@@ -45,7 +49,8 @@ class SwegonFlowHandler(ConfigFlow, domain=DOMAIN):
         if user_input is not None:
             return self.async_create_entry(title=user_input[CONF_NAME], data=user_input)
 
-        return self.async_show_form(step_id="user", data_schema=getDeviceSchema(DEVICE_DATA.copy()), errors=errors)
+        models = await self.hass.async_add_executor_job(list_models)
+        return self.async_show_form(step_id="user", data_schema=getDeviceSchema(DEVICE_DATA.copy(), models), errors=errors)
 
 class SwegonOptionsFlowHandler(OptionsFlow):
     def __init__(self, config_entry):
@@ -62,14 +67,16 @@ class SwegonOptionsFlowHandler(OptionsFlow):
 
             return self.async_create_entry(title="", data={})
 
-        return self.async_show_form(step_id="init", data_schema=getDeviceSchema(self.config_entry.data))
+        models = await self.hass.async_add_executor_job(list_models)
+        return self.async_show_form(step_id="init", data_schema=getDeviceSchema(self.config_entry.data, models))
 
 """ ################################################### """
 """                     Dynamic schemas                 """
 """ ################################################### """
 # Schema taking device details when adding or updating
-def getDeviceSchema(user_input: dict[str, Any] | None = None) -> vol.Schema:
-    DEVICE_TYPES = [DEVICE_CASA_R4, DEVICE_CASA_R15]
+def getDeviceSchema(user_input: dict[str, Any] | None = None, models: dict | None = None) -> vol.Schema:
+    # Models with a register map in pyswegon/maps
+    DEVICE_TYPES = list(models or [DEVICE_CASA_R4])
 
     data_schema = vol.Schema(
         {
@@ -94,6 +101,15 @@ def getDeviceSchema(user_input: dict[str, Any] | None = None) -> vol.Schema:
             vol.Optional(
                 CONF_SCAN_INTERVAL_FAST, default=user_input[CONF_SCAN_INTERVAL_FAST]
             ): vol.All(vol.Coerce(int), vol.Range(min=1, max=999)),
+            vol.Optional(
+                CONF_SCAN_INTERVAL_ALARMS, default=user_input.get(CONF_SCAN_INTERVAL_ALARMS, DEFAULT_SCAN_INTERVAL_ALARMS)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=999)),
+            vol.Optional(
+                CONF_PIPELINE_DEPTH, default=user_input.get(CONF_PIPELINE_DEPTH, DEFAULT_PIPELINE_DEPTH)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=16)),
+            vol.Optional(
+                CONF_STATISTICS_WINDOW, default=user_input.get(CONF_STATISTICS_WINDOW, DEFAULT_STATISTICS_WINDOW)
+            ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
         }
     )
 
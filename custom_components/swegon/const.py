@@ -12,11 +12,57 @@ CONF_PORT: str = "port"
 CONF_SLAVE_ID: str = "slave_id"
 CONF_SCAN_INTERVAL: str = "scan_interval"
 CONF_SCAN_INTERVAL_FAST: str = "scan_interval_fast"
+CONF_SCAN_INTERVAL_ALARMS: str = "scan_interval_alarms"
+CONF_PIPELINE_DEPTH: str = "pipeline_depth"
+CONF_STATISTICS_WINDOW: str = "statistics_window"
 
 # Defaults
 DEFAULT_SCAN_INTERVAL: int = 300  # Seconds
 DEFAULT_SCAN_INTERVAL_FAST: int = 5  # Seconds
+DEFAULT_SCAN_INTERVAL_ALARMS: int = 30  # Seconds
+DEFAULT_PIPELINE_DEPTH: int = 1  # Requests in flight per gateway, 1 sends one at a time
+DEFAULT_STATISTICS_WINDOW: int = 15  # Minutes
 
-# Device types - Name and device file
+# Polling
+SETPOINTS_SCAN_INTERVAL: int = 3 * 3600  # Seconds
+CONFIG_SCAN_INTERVAL: int = 24 * 3600  # Seconds, config values only change when written
+ADAPTIVE_MIN_FACTOR: float = 0.25  # Adaptive groups are polled between 0.25x ...
+ADAPTIVE_MAX_FACTOR: float = 4  # ... and 4x the scan interval
+SETTLE_STABLE_READS: int = 2  # Dependent groups are polled fast after a write until unchanged this many times ...
+SETTLE_MAX_READS: int = 12  # ... or for at most this many reads
+HEALTH_FAILURE_THRESHOLD: int = 3  # Failed polls in a row before the unit is left alone ...
+HEALTH_BASE_DELAY: int = 10  # ... for this many seconds, doubled for each failed probe ...
+HEALTH_MAX_DELAY: int = 600  # ... up to this many seconds
+PROBE_TIMEOUT: int = 5  # Seconds
+WRITE_QUEUE_TTL: int = 300  # Seconds a write made while the unit is unreachable is kept
+
+# Rolling statistics
+STATISTICS_MAX_SAMPLES: int = 1024  # Samples kept per datapoint, whatever the window
+
+# Values read are kept in memory, and sensors are published to Home Assistant less often
+SAMPLE_BUFFER_SIZE: int = 720  # Samples kept per datapoint, one hour at the default fast scan interval
+SENSOR_PUBLISH_INTERVAL: int = 30  # Seconds, for statistics. Datapoints have their own in the register map.
+
+# All units are polled by one fleet scheduler
+FLEET_MAX_POLLS: int = 4  # Units polled at the same time, on one gateway only as many as its requests in flight
+FLEET_RATE_WINDOW: int = 300  # Seconds throughput is averaged over
+
+# Values from the last run are kept in HA storage
+STORAGE_VERSION: int = 1
+STORAGE_SAVE_DELAY: int = 60  # Seconds
+
+# Services
+SERVICE_DUMP_SAMPLES: str = "dump_samples"
+
+# Data shared by all entries, kept in hass.data
+DATA_FLEET: str = "swegon_fleet"
+
+# Events
+EVENT_WRITE_FAILED: str = "swegon_write_failed"
+
+# Groups for values kept by the coordinator: diagnostics, and rolling statistics of datapoints
+DIAGNOSTICS: str = "Diagnostics"
+STATISTICS: str = "Statistics"
+
+# Default device type, other types are listed from the register maps in pyswegon/maps
 DEVICE_CASA_R4 = "CASA R4"
-DEVICE_CASA_R15 = "CASA R15"
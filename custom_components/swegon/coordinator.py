@@ -1,23 +1,80 @@
+import asyncio
 import async_timeout
 import datetime as dt
 import logging
+import time
 
+from contextlib import nullcontext
+from dataclasses import dataclass
+from homeassistant.core import callback
 from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN
-from .pyswegon.swegon import Swegon
+from .const import DOMAIN, DIAGNOSTICS, STATISTICS, SETPOINTS_SCAN_INTERVAL, CONFIG_SCAN_INTERVAL, ADAPTIVE_MIN_FACTOR, ADAPTIVE_MAX_FACTOR
+from .const import SETTLE_STABLE_READS, SETTLE_MAX_READS, WRITE_QUEUE_TTL, EVENT_WRITE_FAILED, STORAGE_SAVE_DELAY
+from .const import HEALTH_FAILURE_THRESHOLD, HEALTH_BASE_DELAY, HEALTH_MAX_DELAY, PROBE_TIMEOUT
+from .const import DEFAULT_STATISTICS_WINDOW, STATISTICS_MAX_SAMPLES, SAMPLE_BUFFER_SIZE, SENSOR_PUBLISH_INTERVAL
+from .health import ConnectionHealth, OPEN
+from .rolling import RollingWindow
+from .samples import SampleBuffer
+from .pyswegon.instrumentation import Histogram
+from .pyswegon.registermaps import PublishPolicy, PUBLISH_ALWAYS
+from .pyswegon.swegon import Swegon, VIRTUAL_DEPENDENCIES
+from .pyswegon.swegon import COMMANDS,SETPOINTS,DEVICE_INFO,ALARMS,SENSORS,SENSORS2,VIRTUALSENSORS,UNIT_STATUSES,CONFIG
+from .scheduler import PollScheduler, PollTask
+from pymodbus.exceptions import ConnectionException, ModbusIOException
 
 _LOGGER = logging.getLogger(__name__)
 
+# Groups that change on the unit after a write, by (group, key) or by group
+WRITE_DEPENDENCIES = {
+    (COMMANDS, "Op_Mode"): (UNIT_STATUSES,),
+    (COMMANDS, "Fireplace_Mode"): (UNIT_STATUSES,),
+    (COMMANDS, "Travelling_Mode"): (UNIT_STATUSES,),
+    (SETPOINTS, "Temp_SP"): (UNIT_STATUSES,),
+    (CONFIG, "Reset_Alarms"): (ALARMS,),
+    CONFIG: (UNIT_STATUSES,),
+}
+
+# Polling classes read once, and not scheduled
+STATIC_POLL_CLASSES = ("Static",)
+
+# Polling classes not read again after a restart until due, live values are read on the first cycle
+RESTORED_POLL_CLASSES = ("Static", "Setpoints", "Config")
+
+# Groups kept in storage between restarts. Alarms are always read fresh.
+PERSISTED_GROUPS = (DEVICE_INFO, COMMANDS, SETPOINTS, CONFIG, SENSORS, SENSORS2, VIRTUALSENSORS, UNIT_STATUSES)
+
+# Always read, whatever entities are enabled
+ALWAYS_READ = ((DEVICE_INFO, None),)
+
+# Datapoints with rolling statistics, by name in the Statistics group
+STATISTICS_SOURCES = {
+    "Efficiency": (VIRTUALSENSORS, "Efficiency"),
+    "Supply_Temp2": (SENSORS, "Supply_Temp2"),
+    "RH": (SENSORS, "RH"),
+    "CO2": (SENSORS, "CO2_Fil"),
+}
+
+# Datapoints are published to entities, and so the recorder, by the policy in the register map.
+# Statistics at most once per interval. Every read is kept in the sample buffers.
+STATISTICS_PUBLISH = PublishPolicy(MinInterval=SENSOR_PUBLISH_INTERVAL)
+
+# Momentary commands, always written even if the value is unchanged
+WRITE_ALWAYS = {(CONFIG, "Reset_Alarms")}
+
+@dataclass
+class PendingValue:
+    """ A written value not yet confirmed by the unit """
+    Value: object
+    Expires: float | None = None    # Set while queued because the unit is unreachable
+
 class SwegonCoordinator(DataUpdateCoordinator):
-    _fast_poll_enabled = False
-    _fast_poll_count = 0
     _normal_poll_interval = 60
     _fast_poll_interval = 10
     
-    def __init__(self, hass, device, device_module:str, ip, port, slave_id, scan_interval, scan_interval_fast):
-        """Initialize coordinator parent"""
+    def __init__(self, hass, device, device_module:str, ip, port, slave_id, scan_interval, scan_interval_fast, scan_interval_alarms, pipeline_depth:int = 1, statistics_window:int = DEFAULT_STATISTICS_WINDOW, fleet=None):
+        """Initialize coordinator parent. With a fleet, the fleet polls instead of a timer per coordinator."""
         super().__init__(
             hass,
             _LOGGER,
@@ -31,12 +88,67 @@ class SwegonCoordinator(DataUpdateCoordinator):
         self._fast_poll_interval = scan_interval_fast
 
         self._device = device
-        self._swegonDevice = Swegon(device_module, ip, port, slave_id)
+        self._device_module = device_module
+        self._swegonDevice = Swegon(device_module, ip, port, slave_id, pipeline_depth=pipeline_depth)
+
+        # Only datapoints entities are added for are read, by (group, key) or (group, None)
+        self._demand = {}
+        self._swegonDevice.setWanted(ALWAYS_READ)
+
+        # Rolling statistics, and the groups whose reads add a sample
+        self._statistics = {name: RollingWindow(statistics_window * 60, STATISTICS_MAX_SAMPLES) for name in STATISTICS_SOURCES}
+        self._statistics_groups = {}
+        for name, source in STATISTICS_SOURCES.items():
+            groups = {group for group, key in (source,) + VIRTUAL_DEPENDENCIES.get(source, ())}
+            self._statistics_groups[name] = groups - {VIRTUALSENSORS}
+
+        # Every value read, by (group, key). Last published (value, time), and held back changes by release time.
+        self._samples = {}
+        self._published = {}
+        self._held = {}
 
-        # Initialize states
-        self._measurements = None
-        self._setpoints = None
-        self._timestamp = dt.datetime(2024, 1, 1)
+        # Values from last run, static device info is read again in the background
+        self._store = None
+        self._revalidate = False
+
+        # Each polling class in the register map is polled on its own schedule.
+        # Unknown classes are polled at the scan interval.
+        intervals = {
+            "Alarms": (scan_interval_alarms, False),
+            "Sensors": (scan_interval, True),
+            "UnitStatuses": (scan_interval, True),
+            "Commands": (scan_interval, True),
+            "Setpoints": (SETPOINTS_SCAN_INTERVAL, False),
+            "Config": (CONFIG_SCAN_INTERVAL, False),
+        }
+        tasks = []
+        for poll, groups in self._swegonDevice.getPollClasses().items():
+            if poll in STATIC_POLL_CLASSES:
+                continue
+            interval, adaptive = intervals.get(poll, (scan_interval, False))
+            tasks.append(PollTask(poll, groups, interval, Adaptive=adaptive))
+        self._scheduler = PollScheduler(tasks, ADAPTIVE_MIN_FACTOR, ADAPTIVE_MAX_FACTOR)
+        self._config_task = next((task for task in tasks if CONFIG in task.Groups), None)
+
+        # Values from last cycle, and (group, key) / (group, None) that changed
+        self._previous = {}
+        self._changed = set()
+        self._notified_success = None
+
+        # Written values shown before they are confirmed, by (group, key)
+        self._pending = {}
+
+        # Read backs not yet started, by group: (task, keys written). Writes sent together are read back together.
+        self._read_backs = {}
+
+        # Groups polled fast after a write, with the number of reads and stable reads
+        self._settling = {}
+
+        # Diagnostics
+        self._cycle_time = Histogram()
+        self._health = ConnectionHealth(HEALTH_FAILURE_THRESHOLD, HEALTH_BASE_DELAY, HEALTH_MAX_DELAY)
+        self._last_error = None
+        self._diagnostics = {}
 
         # Storage for config selection
         self.config_selection = 0
@@ -44,6 +156,11 @@ class SwegonCoordinator(DataUpdateCoordinator):
         # Callback to entities
         self._update_callbacks = {}
 
+        # Polled by the fleet, with all other units
+        self._fleet = fleet
+        if fleet is not None:
+            fleet.register(self, ip, port, self._swegonDevice.PipelineDepth)
+
     @property
     def device_id(self):
         return self._device.id
@@ -56,44 +173,336 @@ class SwegonCoordinator(DataUpdateCoordinator):
     def identifiers(self):
         return self._device.identifiers
 
-    def setFastPollMode(self):
-        _LOGGER.debug("Enabling fast poll mode")
-        self._fast_poll_enabled = True
-        self._fast_poll_count = 0
+    @property
+    def stats(self):
+        return self._swegonDevice.Stats
+
+    def close(self):
+        if self._fleet is not None:
+            self._fleet.unregister(self)
+        self._swegonDevice.close()
+
+    def _slot(self):
+        # Reads outside polls wait for a fleet slot too
+        return nullcontext() if self._fleet is None else self._fleet.slot(self, poll=False)
+
+    @callback
+    def _schedule_refresh(self) -> None:
+        # The fleet polls at update_interval instead of a timer
+        if self._fleet is None:
+            super()._schedule_refresh()
+        elif self.update_interval is not None:
+            self._fleet.schedule(self, self.update_interval.total_seconds())
+
+    @callback
+    def _unschedule_refresh(self) -> None:
+        super()._unschedule_refresh()
+        if self._fleet is not None:
+            self._fleet.unschedule(self)
+
+    def startSettling(self, groups):
+        """ Poll groups fast until their values stop changing """
+        if not groups:
+            return
+        _LOGGER.debug("Settling groups: %s", groups)
+        for group in groups:
+            self._settling[group] = [0, 0]
         self.update_interval = dt.timedelta(seconds=self._fast_poll_interval)
         self._schedule_refresh()
 
-    def setNormalPollMode(self):
-        _LOGGER.debug("Enabling normal poll mode")
-        self._fast_poll_enabled = False
-        self.update_interval = dt.timedelta(seconds=self._normal_poll_interval)
+    def _update_settling(self, groups, success:bool):
+        for group in groups:
+            reads = self._settling[group]
+            reads[0] += 1
+            if success and (group, None) not in self._changed:
+                reads[1] += 1
+            elif success:
+                reads[1] = 0
+            if reads[1] >= SETTLE_STABLE_READS or reads[0] >= SETTLE_MAX_READS:
+                _LOGGER.debug("Group %s settled after %s reads", group, reads[0])
+                del self._settling[group]
+
+    def _update_changed(self, groups) -> set:
+        """ Compare values with the previous cycle and return what changed """
+        changed = set()
+        device = self._swegonDevice
+        for group in groups:
+            for key, data in device.Datapoints[group].items():
+                if device.isWanted(group, key):
+                    self._compare(group, key, data.Value, changed)
+        return changed
+
+    def _compare(self, group, key, value, changed:set):
+        if (group, key) not in self._previous or self._previous[(group, key)] != value:
+            self._previous[(group, key)] = value
+            changed.add((group, key))
+            changed.add((group, None))
+
+    def _update_diagnostics(self, duration:float, decode_time:float) -> set:
+        stats = self._swegonDevice.Stats
+        self._cycle_time.observe(duration)
+        self._diagnostics = {
+            "Cycle_Duration": round(duration * 1000, 1),
+            "Latency_Mean": round(stats.Latency.mean * 1000, 1),
+            "Latency_P95": round(stats.Latency.quantile(0.95) * 1000, 1),
+            "Transactions": stats.Transactions,
+            "Errors": sum(stats.Errors.values()),
+            "Timeouts": sum(stats.Timeouts.values()),
+            "Reconnects": self._swegonDevice.getReconnects(),
+            "Decode_Time": round(decode_time * 1e6, 1),
+            "Health": self._health.State,
+        }
+
+        changed = set()
+        for key, value in self._diagnostics.items():
+            self._compare(DIAGNOSTICS, key, value, changed)
+        return changed
+
+    def _update_statistics(self, groups, now:float) -> set:
+        # Add a sample for each read of a datapoint with statistics shown by an entity
+        changed = set()
+        for name, window in self._statistics.items():
+            if (STATISTICS, name) not in self._demand or not self._statistics_groups[name].intersection(groups):
+                continue
+            value = self._swegonDevice.Datapoints[STATISTICS_SOURCES[name][0]][STATISTICS_SOURCES[name][1]].Value
+            if value is None:
+                continue
+            window.add(value, now)
+            changed.add((STATISTICS, name))
+            changed.add((STATISTICS, None))
+        return changed
+
+    def get_statistics(self, name) -> dict:
+        return self._statistics[name].asDict() if name in self._statistics else {}
+
+    def get_diagnostics(self) -> dict:
+        """ Statistics for the diagnostics download """
+        return {
+            "cycle_time": self._cycle_time.asDict(),
+            "health": self._health.State,
+            "consecutive_failures": self._health.Failures,
+            "last_error": self._last_error,
+            "reconnects": self._swegonDevice.getReconnects(),
+            "device": self._swegonDevice.Stats.asDict(),
+            "poll_intervals": {task.Name: task.Interval for task in self._scheduler.tasks},
+        }
+
+    @callback
+    def async_add_demand(self, group, key):
+        """ Read a datapoint, or a group with key None, until the returned function is called """
+        demand = (group, key)
+        self._demand[demand] = self._demand.get(demand, 0) + 1
+        if self._demand[demand] == 1:
+            self._update_demand()
+
+        @callback
+        def remove():
+            self._demand[demand] -= 1
+            if self._demand[demand] == 0:
+                del self._demand[demand]
+                self._update_demand()
+        return remove
+
+    def _update_demand(self):
+        # Recompile read plans, and read newly wanted datapoints now. Restored setpoints and config are kept until due.
+        demand = [STATISTICS_SOURCES[key] if group == STATISTICS and key in STATISTICS_SOURCES else (group, key) for group, key in self._demand]
+        added = [point for point in self._swegonDevice.setWanted(tuple(demand) + ALWAYS_READ) if point.Count > 0]
+        forced = False
+        for task in self._scheduler.tasks:
+            restored = task.Name in RESTORED_POLL_CLASSES
+            if any(point.Group in task.Groups and not (restored and (point.Group, point.Key) in self._previous) for point in added):
+                task.NextPoll = 0
+                forced = True
+        if forced:
+            self.hass.async_create_task(self.async_request_refresh())
 
+    def get_register_snapshot(self, redacted=(), mask=None) -> dict:
+        return self._swegonDevice.getRegisterSnapshot(redacted, mask)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """ Only update entities bound to values that changed since last cycle """
+        update_all = self._notified_success != self.last_update_success
+        self._notified_success = self.last_update_success
+
+        for update_callback, context in list(self._listeners.values()):
+            if update_all or context is None or context in self._changed:
+                update_callback()
 
     async def _async_update_data(self):
+        if self._fleet is None:
+            return await self._async_poll()
+        async with self._fleet.slot(self):
+            return await self._async_poll()
+
+    async def _async_poll(self):
         _LOGGER.debug("Coordinator updating data!!")
 
-        """ Counter for fast polling """
-        if self._fast_poll_enabled:
-            self._fast_poll_count += 1
-            if self._fast_poll_count > 5:
-                self.setNormalPollMode()
+        """ Fail fast while the circuit is open """
+        now = time.monotonic()
+        if not self._health.allow(now):
+            self.update_interval = dt.timedelta(seconds=max(1, self._health.retry_in(now)))
+            raise UpdateFailed("{} is not responding, retrying in {:.0f} s".format(self.devicename, self._health.retry_in(now)))
+
+        """ Find groups that are due, and groups settling after a write """
+        tasks = self._scheduler.due(now)
+        settling = tuple(self._settling)
+        groups = tuple(dict.fromkeys([group for task in tasks for group in task.Groups] + list(settling)))
+        readGroups = list(groups)
+        success = False
+        start = time.perf_counter()
+        decode_start = self._swegonDevice.Stats.DecodeTime
 
         """ Fetch data """
         try:
+            if not self._health.available:
+                # Half open, check that the unit responds before reading everything
+                async with async_timeout.timeout(PROBE_TIMEOUT):
+                    await self._swegonDevice.probe()
             async with async_timeout.timeout(20):
                 if self._swegonDevice.Datapoints["Device_Info"]["FW_Maj"].Value == 0:
                     await self._swegonDevice.readDeviceInfo()
                     await self._async_update_deviceInfo()
-                if (dt.datetime.now() - self._timestamp) > dt.timedelta(hours=3):
-                    await self._swegonDevice.readSetpoints() 
-                    self._timestamp = dt.datetime.now()
-                await self._swegonDevice.readAlarms()
-                await self._swegonDevice.readSensors()
-                await self._swegonDevice.readCommands()
-                await self._swegonDevice.readUnitStatuses()
-                
+                    readGroups.append(DEVICE_INFO)
+                if groups:
+                    await self._swegonDevice.readGroups(*groups)
+                    readGroups.append(VIRTUALSENSORS)
+                success = True
+
         except Exception as err:
-            _LOGGER.debug("Failed when fetching data: %s", str(err))
+            self._last_error = repr(err)
+            if self._health.Failures == 0:
+                _LOGGER.warning("Failed when fetching data from %s: %s", self.devicename, repr(err))
+            else:
+                _LOGGER.debug("Failed when fetching data: %s", repr(err))
+            self._health.failure()
+            if self._health.State == OPEN:
+                # Stop holding a gateway session for a unit that does not respond
+                self._swegonDevice.suspend()
+
+        if success and self._health.Failures:
+            _LOGGER.info("Fetching data from %s recovered after %s failures", self.devicename, self._health.Failures)
+        if success:
+            self._health.success()
+
+        self._expire_queued()
+        if success and self._revalidate:
+            self._revalidate = False
+            self.hass.async_create_task(self._async_revalidate_deviceInfo())
+        if success and any(pending.Expires is not None for pending in self._pending.values()):
+            self.hass.async_create_task(self._async_write_queued())
+
+        """ Find changed values """
+        self._changed = self._update_changed(readGroups) if success else set()
+        if success:
+            self._changed |= self._update_statistics(readGroups, now)
+        self._changed |= self._update_diagnostics(time.perf_counter() - start, self._swegonDevice.Stats.DecodeTime - decode_start)
+        if any(group in PERSISTED_GROUPS for group, key in self._changed):
+            self._schedule_save()
+
+        """ Reschedule """
+        for task in tasks:
+            # Tasks with nothing wanted read nothing, keep their interval
+            read = self._swegonDevice.getReadPlan(tuple(task.Groups))
+            changed = any((group, None) in self._changed for group in task.Groups) if success and read else None
+            self._scheduler.polled(task, changed, now)
+        self._update_settling(settling, success)
+
+        """ Keep every value, and only tell entities about the ones due to be published """
+        if success:
+            self._record_samples(readGroups)
+        self._changed = self._publish(self._changed, now)
+
+        if self._health.State == OPEN:
+            self.update_interval = dt.timedelta(seconds=max(1, self._health.retry_in()))
+            raise UpdateFailed("{} is not responding: {}".format(self.devicename, self._last_error))
+        elif self._settling:
+            self.update_interval = dt.timedelta(seconds=self._fast_poll_interval)
+        else:
+            self.update_interval = dt.timedelta(seconds=max(1, self._scheduler.next_due(default=self._normal_poll_interval)))
+
+        # Come back for changes held back, if nothing else is due before
+        release = self._next_release(now)
+        if release is not None and not self._settling and release < self.update_interval.total_seconds():
+            self.update_interval = dt.timedelta(seconds=max(1, release))
+
+    """ ******************************************************* """
+    """ ***************** SAMPLES AND PUBLISHING ************** """
+    """ ******************************************************* """
+    def _record_samples(self, groups):
+        timestamp = dt.datetime.now(dt.timezone.utc).timestamp()
+        device = self._swegonDevice
+        for group in groups:
+            if group == DEVICE_INFO:
+                continue
+            for key, data in device.Datapoints[group].items():
+                value = data.Value
+                if isinstance(value, (int, float)) and device.isWanted(group, key):
+                    buffer = self._samples.get((group, key))
+                    if buffer is None:
+                        buffer = self._samples[(group, key)] = SampleBuffer(SAMPLE_BUFFER_SIZE)
+                    buffer.add(timestamp, value)
+
+    def get_samples(self, keys=None, seconds:float | None = None) -> dict:
+        """ Samples by "group.key", optionally only for some keys and the last seconds """
+        since = None
+        if seconds is not None:
+            since = dt.datetime.now(dt.timezone.utc).timestamp() - seconds
+        return {"{}.{}".format(group, key): buffer.samples(since)
+                for (group, key), buffer in self._samples.items() if not keys or key in keys}
+
+    def _publish_policy(self, group, key) -> PublishPolicy:
+        if group == STATISTICS:
+            return STATISTICS_PUBLISH
+        data = self._swegonDevice.Datapoints.get(group, {}).get(key)
+        return PUBLISH_ALWAYS if data is None else data.Publish
+
+    def _publish(self, changed:set, now:float) -> set:
+        """ Changes to tell entities about. The rest are held back, and published later.
+
+        A change is published when it is larger than the deadband of the datapoint, but
+        not sooner than MinInterval after the last one. Smaller changes are published
+        after MaxInterval, or dropped if the value goes back to the published one.
+        """
+        published = set()
+        for name in changed | self._held.keys():
+            group, key = name
+            if key is None:
+                continue
+            policy = self._publish_policy(group, key)
+            if policy != PUBLISH_ALWAYS:
+                value = self.get_value(group, key)
+                last = self._published.get(name)
+                self._held.pop(name, None)
+                if last is not None:
+                    if value == last[0]:
+                        continue
+                    elapsed = now - last[1]
+                    if elapsed < policy.MinInterval:
+                        self._held[name] = last[1] + policy.MinInterval
+                        continue
+                    if not self._significant(policy, value, last[0]):
+                        if policy.MaxInterval and elapsed < policy.MaxInterval:
+                            self._held[name] = last[1] + policy.MaxInterval
+                            continue
+                        if not policy.MaxInterval:
+                            continue
+                self._published[name] = (value, now)
+            published.add(name)
+            published.add((group, None))
+        return published
+
+    @staticmethod
+    def _significant(policy:PublishPolicy, value, lastValue) -> bool:
+        if not isinstance(value, (int, float)) or not isinstance(lastValue, (int, float)):
+            return True
+        return abs(value - lastValue) >= max(policy.Deadband, policy.Relative * abs(lastValue), 1e-9)
+
+    def _next_release(self, now:float) -> float | None:
+        # Seconds until the first held back change may be published
+        if not self._held:
+            return None
+        return min(self._held.values()) - now
 
     async def _async_update_deviceInfo(self) -> None:
         device_registry = dr.async_get(self.hass)
@@ -106,15 +515,91 @@ class SwegonCoordinator(DataUpdateCoordinator):
         )
         _LOGGER.debug("Updated device data for: %s", self.devicename) 
 
+    async def _async_revalidate_deviceInfo(self) -> None:
+        try:
+            async with self._slot():
+                await self._swegonDevice.readDeviceInfo()
+        except Exception as err:
+            _LOGGER.debug("Failed to read device info: %s", repr(err))
+            self._revalidate = True
+            return
+        if self._update_changed((DEVICE_INFO,)):
+            _LOGGER.info("Device info changed for: %s", self.devicename)
+            await self._async_update_deviceInfo()
+            self._schedule_save()
+
+    """ ******************************************************* """
+    """ *********************** STORAGE *********************** """
+    """ ******************************************************* """
+    async def async_restore(self, store) -> None:
+        """ Restore values and poll times from last run """
+        self._store = store
+        data = await store.async_load()
+        if not data or data.get("model") != self._device_module:
+            return
+
+        datapoints = self._swegonDevice.Datapoints
+        for group, values in data.get("values", {}).items():
+            for key, value in values.items():
+                if group in PERSISTED_GROUPS and key in datapoints[group]:
+                    datapoints[group][key].Value = value
+                    self._previous[(group, key)] = value
+
+        # Setpoints and config read recently are not read again until they are due
+        monotonic = time.monotonic()
+        now = dt.datetime.now(dt.timezone.utc).timestamp()
+        for task in self._scheduler.tasks:
+            polled = data.get("polled", {}).get(task.Name)
+            if polled is None or task.Name not in RESTORED_POLL_CLASSES:
+                continue
+            task.Interval = min(task.MaxInterval, max(task.MinInterval, polled["interval"]))
+            task.NextPoll = monotonic + max(0, task.Interval - (now - polled["time"]))
+
+        self._revalidate = datapoints[DEVICE_INFO]["FW_Maj"].Value != 0
+        _LOGGER.debug("Restored values for: %s", self.devicename)
+
+    async def async_save(self) -> None:
+        if self._store is not None:
+            await self._store.async_save(self._data_to_save())
+
+    def _schedule_save(self):
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, STORAGE_SAVE_DELAY)
+
+    def _data_to_save(self) -> dict:
+        values = {}
+        for (group, key), value in self._previous.items():
+            if group in PERSISTED_GROUPS:
+                values.setdefault(group, {})[key] = value
+
+        monotonic = time.monotonic()
+        now = dt.datetime.now(dt.timezone.utc).timestamp()
+        polled = {task.Name: {"interval": task.Interval, "time": now - (monotonic - (task.NextPoll - task.Interval))}
+                  for task in self._scheduler.tasks if task.NextPoll}
+        return {"model": self._device_module, "values": values, "polled": polled}
+
     def registerOnUpdateCallback(self, entity, callbackfunc):
         self._update_callbacks.update({entity: callbackfunc})
 
+    async def async_read_config(self):
+        """ Read all config values, they are kept until the snapshot is older than CONFIG_SCAN_INTERVAL """
+        async with self._slot():
+            now = time.monotonic()
+            await self._swegonDevice.readGroups(CONFIG)
+        self._changed = self._update_changed((CONFIG,))
+        if self._config_task is not None:
+            self._scheduler.polled(self._config_task, None, now)
+        self.async_update_listeners()
+        self._schedule_save()
+
     async def config_select(self, key, value):
         _LOGGER.debug("Selected: %s", key)
 
         self.config_selection = value
         try:
-            await self._swegonDevice.readValue("Config", key)
+            # Written values are read back, so the snapshot is only read when it has expired
+            if self._config_task is None or self._config_task.NextPoll <= time.monotonic():
+                await self.async_read_config()
         finally:
             await self._update_callbacks["Config_Value"](key)
 
@@ -125,13 +610,157 @@ class SwegonCoordinator(DataUpdateCoordinator):
             options.update({i:config})
         return options
 
+    def get_values(self) -> dict:
+        """ All current values, by group """
+        values = {group: {key: data.Value for key, data in datapoints.items()}
+                  for group, datapoints in self._swegonDevice.Datapoints.items()}
+        values[DIAGNOSTICS] = dict(self._diagnostics)
+        values[STATISTICS] = {name: window.asDict() for name, window in self._statistics.items() if len(window)}
+        return values
+
+    def get_keys(self, group) -> list:
+        return list(self._swegonDevice.Datapoints.get(group, {}))
+
+    def get_accessor(self, group, key):
+        """ Function returning the current value of a datapoint, resolved once when an entity is created """
+        if group == DIAGNOSTICS:
+            return lambda: self._diagnostics.get(key)
+        if group == STATISTICS:
+            return lambda: self.get_statistics(key).get("mean")
+        if group not in self._swegonDevice.Datapoints or key not in self._swegonDevice.Datapoints[group]:
+            return lambda: None
+
+        read = self._swegonDevice.getReader(group, key)
+        pending = self._pending
+        pendingKey = (group, key)
+
+        def accessor():
+            if pending and pendingKey in pending:
+                return pending[pendingKey].Value
+            return read()
+        return accessor
+
     def get_value(self, group, key):
+        if group == DIAGNOSTICS:
+            return self._diagnostics.get(key)
+        if group == STATISTICS:
+            return self.get_statistics(key).get("mean")
+        if (group, key) in self._pending:
+            return self._pending[(group, key)].Value
         if group in self._swegonDevice.Datapoints:
             if key in self._swegonDevice.Datapoints[group]:
                 return self._swegonDevice.Datapoints[group][key].Value
         return None
 
+    def is_pending(self, group, key) -> bool:
+        return (group, key) in self._pending
+
+    def _notify(self, group, key):
+        self._changed = {(group, key), (group, None)}
+        self.async_update_listeners()
+
     async def write_value(self, group, key, value) -> bool:
+        """ Write a value, shown right away and confirmed by reading it back.
+
+        Returns True when the unit has the value. Writes made while the unit is
+        unreachable are queued, and sent when it responds again.
+        """
         _LOGGER.debug("Write_Data: %s - %s - %s", group, key, value)
-        await self._swegonDevice.writeValue(group, key, value)
-        self.setFastPollMode()
+        pending = self._pending.get((group, key))
+        if (group, key) not in WRITE_ALWAYS:
+            if pending is not None and pending.Value == value:
+                _LOGGER.debug("Dropping write, %s - %s is already being written", group, key)
+                return pending.Expires is None
+            if pending is None and (group, key) in self._previous and self._swegonDevice.hasValue(group, key, value):
+                _LOGGER.debug("Dropping write, %s - %s already has this value", group, key)
+                return True
+
+        self._pending[(group, key)] = PendingValue(value)
+        self._notify(group, key)
+
+        if self._health.Failures:
+            self._queue(group, key, value)
+            return False
+        return await self._async_write(group, key, value)
+
+    def _queue(self, group, key, value):
+        _LOGGER.debug("Unit unreachable, queueing write: %s - %s - %s", group, key, value)
+        self._pending[(group, key)] = PendingValue(value, time.monotonic() + WRITE_QUEUE_TTL)
+
+    async def _async_write(self, group, key, value) -> bool:
+        try:
+            await self._swegonDevice.writeValue(group, key, value)
+        except (ConnectionException, ModbusIOException, asyncio.TimeoutError) as err:
+            self._queue(group, key, value)
+            return False
+        except Exception as err:
+            self._rollback(group, key, value, repr(err))
+            raise
+
+        """ Read back the written group, then follow the groups it affects """
+        try:
+            await self._async_read_back(group, key)
+        except Exception as err:
+            _LOGGER.debug("Failed to read back %s - %s: %s", group, key, repr(err))
+
+        readback = self._swegonDevice.Datapoints[group][key].Value
+        confirmed = self._swegonDevice.hasValue(group, key, value)
+        if confirmed or (group, key) in WRITE_ALWAYS:
+            if self._pending.get((group, key), PendingValue(None)).Value == value:
+                del self._pending[(group, key)]
+        else:
+            self._rollback(group, key, value, "Read back {}".format(readback))
+        self._compare(group, key, readback, set())
+        self._notify(group, key)
+        self._schedule_save()
+        return confirmed
+
+    async def _async_read_back(self, group, key):
+        # Writes confirmed at the same time join the same read of their group
+        read_back = self._read_backs.get(group)
+        if read_back is None:
+            read_back = self._read_backs[group] = (self.hass.async_create_task(self._async_read_group(group)), set())
+        read_back[1].add(key)
+        await read_back[0]
+
+    async def _async_read_group(self, group):
+        # Writes confirmed from now on need a read of their own
+        task, keys = self._read_backs.pop(group)
+        try:
+            async with self._slot():
+                await self._swegonDevice.readValues(group, sorted(keys))
+        finally:
+            settle = set()
+            for key in keys:
+                settle.update(WRITE_DEPENDENCIES.get((group, key), WRITE_DEPENDENCIES.get(group, ())))
+            self.startSettling(settle)
+
+    def _rollback(self, group, key, value, reason:str):
+        _LOGGER.warning("Write to %s %s - %s failed: %s", self.devicename, group, key, reason)
+        pending = self._pending.get((group, key))
+        if pending is not None and pending.Value == value:
+            del self._pending[(group, key)]
+        self._notify(group, key)
+        self.hass.bus.async_fire(EVENT_WRITE_FAILED, {
+            "device_id": self.device_id,
+            "group": group,
+            "key": key,
+            "value": value,
+            "reason": reason,
+        })
+
+    def _expire_queued(self):
+        now = time.monotonic()
+        for (group, key), pending in list(self._pending.items()):
+            if pending.Expires is not None and pending.Expires < now:
+                self._rollback(group, key, pending.Value, "Unit unreachable")
+
+    async def _async_write_queued(self):
+        for (group, key), pending in list(self._pending.items()):
+            if pending.Expires is None:
+                continue
+            self._pending[(group, key)] = PendingValue(pending.Value)
+            try:
+                await self._async_write(group, key, pending.Value)
+            except Exception as err:
+                _LOGGER.debug("Queued write failed: %s - %s: %s", group, key, repr(err))
@@ -0,0 +1,22 @@
+"""Diagnostics support for Swegon CASA."""
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+
+from .const import DOMAIN, DATA_FLEET, CONF_IP
+from .pyswegon.swegon import DEVICE_INFO
+
+TO_REDACT = {CONF_IP, "Serial_Number"}
+
+# Datapoints whose raw registers are redacted
+REDACTED_REGISTERS = ((DEVICE_INFO, "Serial_Number"),)
+
+async def async_get_config_entry_diagnostics(hass, config_entry) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]
+
+    return {
+        "entry": async_redact_data(config_entry.data, TO_REDACT),
+        "statistics": coordinator.get_diagnostics(),
+        "fleet": hass.data[DATA_FLEET].asDict(),
+        "values": async_redact_data(coordinator.get_values(), TO_REDACT),
+        "registers": coordinator.get_register_snapshot(REDACTED_REGISTERS, REDACTED),
+    }
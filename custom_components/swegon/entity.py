@@ -11,9 +11,13 @@ _LOGGER = logging.getLogger(__name__)
 class SwegonBaseEntity(CoordinatorEntity):
     """Swego base entity class."""
 
-    def __init__(self, coordinator, swegonentity):
-        """Pass coordinator to CoordinatorEntity."""
-        super().__init__(coordinator)
+    def __init__(self, coordinator, swegonentity, context=None):
+        """Pass coordinator to CoordinatorEntity.
+
+        The context is the (group, key) this entity is updated for, (group, None) for
+        updates on any change in the group.
+        """
+        super().__init__(coordinator, context or (swegonentity.group, swegonentity.key))
 
         """Generic Entity properties"""
         self._attr_entity_category = swegonentity.data_type.category
@@ -25,9 +29,15 @@ class SwegonBaseEntity(CoordinatorEntity):
         }
         self._extra_state_attributes = {}
         
-        """Store this entities key."""
+        """Store this entities key, and the accessor for its value"""
         self._group = swegonentity.group
         self._key = swegonentity.key
+        self._value = coordinator.get_accessor(self._group, self._key)
+
+    async def async_added_to_hass(self) -> None:
+        """Read this entity's registers while it is enabled."""
+        await super().async_added_to_hass()
+        self.async_on_remove(self.coordinator.async_add_demand(*self.coordinator_context))
 
     @property
     def extra_state_attributes(self):
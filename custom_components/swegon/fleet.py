@@ -0,0 +1,227 @@
+"""Polling of all Swegon units, shared by the config entries."""
+import asyncio
+import itertools
+import logging
+import time
+
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from homeassistant.core import callback
+
+from .pyswegon.instrumentation import Histogram
+
+_LOGGER = logging.getLogger(__name__)
+
+# Units get phases 0.618, 0.236, 0.854, ... of their interval, evenly apart for any number of units
+GOLDEN_RATIO = 0.6180339887498949
+
+@dataclass
+class FleetUnit:
+    """ A unit polled by the fleet """
+    Coordinator: object
+    Gateway: tuple                  # (host, port)
+    Depth: int                      # Requests in flight on the gateway
+    Phase: float                    # Fraction of the interval the first poll is delayed by
+    Due: float | None = None        # time.monotonic() when the next poll starts, None if not scheduled
+    Deadline: float = 0             # Due plus the interval, polls waiting for a slot start earliest deadline first
+    Polling: bool = False           # Poll started by the fleet running
+    Polled: bool = False            # Polled by the fleet since it was registered
+
+class FleetScheduler:
+    """ Polls the units of all config entries, instead of a timer for each coordinator.
+
+    The first poll of each unit is delayed by a phase of its interval, so units set up
+    together, like after a restart, are not polled together from then on. At most
+    max_polls units are polled at the same time, and at most the pipeline depth of a
+    gateway on the same gateway. Polls waiting for a slot get one earliest deadline
+    first, so units with short intervals do not starve units with long ones. Refreshes
+    and reads not started by the fleet, like reading back a write, wait for a slot too,
+    but before any scheduled poll. Writes are not limited, they are sent as soon as
+    the write window closes, so writes made together go out in one request.
+    """
+    def __init__(self, hass, max_polls:int, rate_window:float):
+        self._hass = hass
+        self._max_polls = max_polls
+        self._rate_window = rate_window
+        self._units = {}                # Coordinator -> FleetUnit
+        self._gateways = {}             # Gateway -> [polls running, max polls]
+        self._running = 0
+        self._waiting = []              # [deadline, sequence, gateway, future]
+        self._sequence = itertools.count()
+        self._registered = 0
+        self._timer = None
+
+        # Throughput
+        self.Polls = 0
+        self.Transactions = 0
+        self.MaxRunning = 0
+        self.Wait = Histogram()
+        self._created = time.monotonic()
+        self._history = deque()         # (time, transactions, poll) of each slot used in the rate window
+
+    """ ******************************************************* """
+    """ ********************** UNITS ************************** """
+    """ ******************************************************* """
+    @callback
+    def register(self, coordinator, host:str, port:int, pipeline_depth:int = 1):
+        gateway = (host, port)
+        self._registered += 1
+        self._units[coordinator] = FleetUnit(coordinator, gateway, pipeline_depth, (self._registered * GOLDEN_RATIO) % 1)
+        self._gateways.setdefault(gateway, [0, 1])
+        self._update_gateway(gateway)
+
+    @callback
+    def unregister(self, coordinator):
+        unit = self._units.pop(coordinator, None)
+        if unit is not None:
+            self._update_gateway(unit.Gateway)
+        self._arm()
+
+    def _update_gateway(self, gateway:tuple):
+        # Units on a gateway are polled one at a time, unless it handles requests in flight.
+        # The gateway is forgotten when its last unit is gone, and nothing is running or waiting.
+        slots = self._gateways.get(gateway)
+        if slots is None:
+            return
+        depths = [unit.Depth for unit in self._units.values() if unit.Gateway == gateway]
+        if depths:
+            slots[1] = max(1, *depths)
+        elif slots[0] == 0 and not any(waiter[2] == gateway for waiter in self._waiting):
+            del self._gateways[gateway]
+
+    @callback
+    def schedule(self, coordinator, delay:float):
+        """ Poll a unit after delay seconds """
+        unit = self._units.get(coordinator)
+        if unit is None:
+            return
+        unit.Due = time.monotonic() + delay
+        if not unit.Polled:
+            unit.Due += unit.Phase * delay
+        unit.Deadline = unit.Due + delay
+        self._arm()
+
+    @callback
+    def unschedule(self, coordinator):
+        unit = self._units.get(coordinator)
+        if unit is not None:
+            unit.Due = None
+            self._arm()
+
+    def _arm(self):
+        # One timer, for the first unit due
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        due = [unit.Due for unit in self._units.values() if unit.Due is not None and not unit.Polling]
+        if due:
+            delay = max(0, min(due) - time.monotonic())
+            self._timer = self._hass.loop.call_later(delay, self._start_due)
+
+    @callback
+    def _start_due(self):
+        self._timer = None
+        if self._hass.is_stopping:
+            return
+        now = time.monotonic()
+        for unit in self._units.values():
+            if unit.Due is not None and unit.Due <= now and not unit.Polling:
+                unit.Polling = unit.Polled = True
+                unit.Due = None
+                self._hass.async_create_task(self._poll(unit))
+        self._arm()
+
+    async def _poll(self, unit:FleetUnit):
+        try:
+            await unit.Coordinator.async_refresh()
+        finally:
+            unit.Polling = False
+            self._arm()
+
+    """ ******************************************************* """
+    """ ********************** SLOTS ************************** """
+    """ ******************************************************* """
+    @asynccontextmanager
+    async def slot(self, coordinator, poll:bool = True):
+        """ Wait until the unit may be polled, within the global and gateway limits. poll is False for other reads. """
+        unit = self._units.get(coordinator)
+        if unit is None:
+            yield
+            return
+
+        start = time.monotonic()
+        deadline = unit.Deadline if unit.Polling else start
+        waiter = [deadline, next(self._sequence), unit.Gateway, asyncio.get_running_loop().create_future()]
+        self._waiting.append(waiter)
+        self._grant()
+        try:
+            await waiter[3]
+        except asyncio.CancelledError:
+            if waiter in self._waiting:
+                self._waiting.remove(waiter)
+                self._update_gateway(unit.Gateway)
+            elif not waiter[3].cancelled():
+                self._release(unit.Gateway)
+            raise
+
+        self.Wait.observe(time.monotonic() - start)
+        stats = coordinator.stats
+        transactions = stats.Transactions
+        try:
+            yield
+        finally:
+            self._release(unit.Gateway)
+            self._record(stats.Transactions - transactions, poll)
+
+    def _grant(self):
+        # Start waiting polls earliest deadline first, skipping those whose gateway is busy
+        self._waiting.sort(key=lambda waiter: (waiter[0], waiter[1]))
+        for waiter in list(self._waiting):
+            if self._running >= self._max_polls:
+                break
+            slots = self._gateways[waiter[2]]
+            if slots[0] >= slots[1]:
+                continue
+            self._waiting.remove(waiter)
+            slots[0] += 1
+            self._running += 1
+            self.MaxRunning = max(self.MaxRunning, self._running)
+            waiter[3].set_result(None)
+
+    def _release(self, gateway:tuple):
+        self._running -= 1
+        self._gateways[gateway][0] -= 1
+        self._update_gateway(gateway)
+        self._grant()
+
+    def _record(self, transactions:int, poll:bool):
+        now = time.monotonic()
+        self.Polls += poll
+        self.Transactions += transactions
+        self._history.append((now, transactions, poll))
+        while self._history and now - self._history[0][0] > self._rate_window:
+            self._history.popleft()
+
+    """ ******************************************************* """
+    """ ******************** THROUGHPUT *********************** """
+    """ ******************************************************* """
+    def asDict(self) -> dict:
+        now = time.monotonic()
+        history = [(transactions, poll) for used, transactions, poll in self._history if now - used <= self._rate_window]
+        window = max(1, min(self._rate_window, now - self._created))
+        return {
+            "units": len(self._units),
+            "gateways": [{"units": sum(unit.Gateway == gateway for unit in self._units.values()), "running": slots[0], "max_polls": slots[1]}
+                         for gateway, slots in self._gateways.items()],
+            "max_polls": self._max_polls,
+            "running": self._running,
+            "max_running": self.MaxRunning,
+            "waiting": len(self._waiting),
+            "polls": self.Polls,
+            "transactions": self.Transactions,
+            "polls_per_minute": sum(poll for transactions, poll in history) * 60 / window,
+            "transactions_per_second": sum(transactions for transactions, poll in history) / window,
+            "wait": self.Wait.asDict(),
+        }
@@ -0,0 +1,70 @@
+"""Connection health for Swegon units."""
+import logging
+import random
+import time
+
+_LOGGER = logging.getLogger(__name__)
+
+# Health states
+CONNECTED = "connected"
+DEGRADED = "degraded"           # Some reads failed, still polling as normal
+OPEN = "open"                   # Unit is not polled until the backoff delay has passed
+HALF_OPEN = "half_open"         # Probing the unit with a single register read
+
+class ConnectionHealth:
+    """ Circuit breaker for one unit.
+
+    After failure_threshold failed polls in a row the circuit opens, and the unit is
+    left alone for a backoff delay that doubles for each failed probe, with jitter
+    so units behind the same gateway do not retry at the same time.
+    """
+    def __init__(self, failure_threshold:int, base_delay:float, max_delay:float, jitter:float = 0.2, rng=None):
+        self._threshold = failure_threshold
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._jitter = jitter
+        self._rng = rng or random.Random()
+
+        self.State = CONNECTED
+        self.Failures = 0           # Failed polls in a row
+        self.Opens = 0              # Times opened since last success
+        self.RetryAt = 0.0          # time.monotonic() when an open circuit may be probed
+
+    @property
+    def available(self) -> bool:
+        return self.State in (CONNECTED, DEGRADED)
+
+    def allow(self, now:float | None = None) -> bool:
+        """ Return True if the unit may be contacted now """
+        now = time.monotonic() if now is None else now
+        if self.State == OPEN:
+            if now < self.RetryAt:
+                return False
+            self.State = HALF_OPEN
+            _LOGGER.debug("Circuit half open, probing")
+        return True
+
+    def success(self):
+        if self.State != CONNECTED:
+            _LOGGER.debug("Circuit closed after %s failures", self.Failures)
+        self.State = CONNECTED
+        self.Failures = 0
+        self.Opens = 0
+
+    def failure(self, now:float | None = None):
+        now = time.monotonic() if now is None else now
+        self.Failures += 1
+        if self.State == HALF_OPEN or self.Failures >= self._threshold:
+            delay = min(self._max_delay, self._base_delay * 2 ** self.Opens)
+            delay *= self._rng.uniform(1 - self._jitter, 1 + self._jitter)
+            self.Opens += 1
+            self.State = OPEN
+            self.RetryAt = now + delay
+            _LOGGER.debug("Circuit open for %.0f s after %s failures", delay, self.Failures)
+        else:
+            self.State = DEGRADED
+
+    def retry_in(self, now:float | None = None) -> float:
+        """ Seconds until an open circuit may be probed """
+        now = time.monotonic() if now is None else now
+        return max(0, self.RetryAt - now)
@@ -3,7 +3,7 @@ import logging
 from collections import namedtuple
 from homeassistant.components.number import NumberDeviceClass, NumberEntity
 from homeassistant.const import CONF_DEVICES
-from homeassistant.const import UnitOfTemperature
+from homeassistant.const import PERCENTAGE, UnitOfTemperature
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.helpers.entity import EntityCategory
 
@@ -16,16 +16,34 @@ LimitsTuple = namedtuple('limits', ['min_value', 'max_value', 'step'])
 LIMITS = {}
 LIMITS["temperature"] = LimitsTuple(13, 25, 0.1)
 LIMITS["config"] = LimitsTuple(-2147483648, 2147483647, 1)
+LIMITS["percent"] = LimitsTuple(0, 100, 1)
 
 DATA_TYPE = namedtuple('DataType', ['units', 'deviceClass', 'category', 'icon'])
 DATA_TYPES = {}
 DATA_TYPES["temperature"] = DATA_TYPE(UnitOfTemperature.CELSIUS, NumberDeviceClass.TEMPERATURE, None, None)
 DATA_TYPES["config"] = DATA_TYPE(None, None, EntityCategory.CONFIG, None)
+DATA_TYPES["config_percent"] = DATA_TYPE(PERCENTAGE, None, EntityCategory.CONFIG, None)
 
-SwegonEntity = namedtuple('SwegonEntity', ['group', 'key', 'entityName', 'data_type', 'limits'])
+SwegonEntity = namedtuple('SwegonEntity', ['group', 'key', 'entityName', 'data_type', 'limits', 'enabled'], defaults=(True,))
 ENTITIES = [
     SwegonEntity("Setpoints", "Temp_SP", "Temperature Setpoint", DATA_TYPES["temperature"], LIMITS["temperature"]),
     SwegonEntity("Config", "Config_Value", "Config Value", DATA_TYPES["config"], LIMITS["config"]),
+
+    # One entity per config value, read from the config snapshot
+    SwegonEntity("Config", "Travelling_Mode_Speed_Drop", "Travelling Mode Speed Drop", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Fireplace_Run_Time", "Fireplace Run Time", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Fireplace_Max_Speed_Difference", "Fireplace Max Speed Difference", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Night_Cooling", "Night Cooling", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Night_Cooling_FreshAir_Max", "Night Cooling Fresh Air Max", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Night_Cooling_FreshAir_Start", "Night Cooling Fresh Air Start", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Night_Cooling_RoomTemp_Start", "Night Cooling Room Temp Start", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Night_Cooling_SupplyTemp_Min", "Night Cooling Supply Temp Min", DATA_TYPES["config"], LIMITS["config"], False),
+    SwegonEntity("Config", "Away_Supply_Speed", "Away Supply Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
+    SwegonEntity("Config", "Away_Exhaust_Speed", "Away Exhaust Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
+    SwegonEntity("Config", "Home_Supply_Speed", "Home Supply Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
+    SwegonEntity("Config", "Home_Exhaust_Speed", "Home Exhaust Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
+    SwegonEntity("Config", "Boost_Supply_Speed", "Boost Supply Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
+    SwegonEntity("Config", "Boost_Exhaust_Speed", "Boost Exhaust Speed", DATA_TYPES["config_percent"], LIMITS["percent"], False),
 ]
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
@@ -47,7 +65,9 @@ class SwegonNumberEntity(SwegonBaseEntity, NumberEntity):
 
     def __init__(self, coordinator, swegonentity):
         """Pass coordinator to PaxCalimaEntity."""
-        super().__init__(coordinator, swegonentity)
+        # Config_Value shows whichever config key is selected, so we update on any change in the group
+        context = (swegonentity.group, None) if swegonentity.key == "Config_Value" else None
+        super().__init__(coordinator, swegonentity, context)
 
         """Number Entity properties"""
         self._attr_device_class = swegonentity.data_type.deviceClass
@@ -56,19 +76,21 @@ class SwegonNumberEntity(SwegonBaseEntity, NumberEntity):
         self._attr_native_max_value = swegonentity.limits.max_value
         self._attr_native_step = swegonentity.limits.step
         self._attr_native_unit_of_measurement = swegonentity.data_type.units
+        self._attr_entity_registry_enabled_default = swegonentity.enabled
 
         """Callback for updated value"""
-        coordinator.registerOnUpdateCallback(self._key, self.update_callback)
+        if self._key == "Config_Value":
+            coordinator.registerOnUpdateCallback(self._key, self.update_callback)
 
     async def update_callback(self, newKey):
         self._key = newKey
+        self._value = self.coordinator.get_accessor(self._group, self._key)
         self.async_schedule_update_ha_state(force_refresh=False)
 
     @property
     def native_value(self) -> float | None:
         """Return number value."""
-        val = self.coordinator.get_value(self._group, self._key)
-        return val
+        return self._value()
 
     async def async_set_native_value(self, value):
         """ Write value to device """
@@ -0,0 +1,76 @@
+from array import array
+from operator import mul
+
+import logging
+import struct
+import sys
+
+_LOGGER = logging.getLogger(__name__)
+
+# Data types
+INT16 = "int16"
+UINT16 = "uint16"
+INT32 = "int32"
+STRING = "string"       # One ASCII character per register (low byte)
+
+# Struct format and number of registers for each type
+FORMATS = {INT16: 'h', UINT16: 'H', INT32: 'i'}
+WIDTHS = {INT16: 1, UINT16: 1, INT32: 2}
+
+_SWAP = sys.byteorder == 'little'
+
+class DecodeTable:
+    """ Precompiled decoding of one read block.
+
+    One struct unpack converts the whole block to typed values (gaps are skipped),
+    and a scaling vector is applied in one pass.
+    """
+    __slots__ = ("Struct", "Indexes", "Scales", "Strings")
+
+    def __init__(self, targets):
+        fmt = '>'
+        position = 0
+        self.Indexes = []
+        self.Scales = []
+        self.Strings = []
+
+        for point, offset in targets:
+            if offset > position:
+                fmt += '{}x'.format(2 * (offset - position))
+            if point.Type == STRING:
+                fmt += '{}s'.format(2 * point.Count)
+                self.Strings.append(len(self.Indexes))
+            else:
+                fmt += FORMATS[point.Type]
+            position = offset + point.Count
+
+            self.Indexes.append(point.Index)
+            self.Scales.append(1 if point.Scaling == 1 or point.Type == STRING else point.Scaling)
+
+        self.Struct = struct.Struct(fmt)
+
+    def decode(self, words:array) -> list:
+        if _SWAP:
+            words = array('H', words)
+            words.byteswap()
+        values = list(map(mul, self.Struct.unpack_from(words.tobytes()), self.Scales))
+        for position in self.Strings:
+            values[position] = decode_string(values[position])
+        return values
+
+def register_count(data_type:str, count:int) -> int:
+    return count if data_type == STRING else WIDTHS[data_type]
+
+def decode_string(data:bytes) -> str:
+    # Characters are stored in the low byte of each register
+    return data[1::2].rstrip(b'\x00').decode('ascii', errors='replace')
+
+def encode_value(point, value) -> list:
+    """ Convert a scaled value to registers for writing """
+    if point.Type == STRING:
+        chars = [ord(c) for c in value[:point.Count]]
+        return chars + [0] * (point.Count - len(chars))
+
+    raw = round(value / point.Scaling)
+    data = struct.pack('>' + FORMATS[point.Type], raw)
+    return list(struct.unpack('>{}H'.format(len(data) // 2), data))
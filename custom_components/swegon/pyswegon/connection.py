@@ -0,0 +1,120 @@
+import asyncio
+import logging
+
+from pymodbus.client import AsyncModbusTcpClient
+from pymodbus.exceptions import ConnectionException
+
+from .pipeline import FC_READ_HOLDING, FC_READ_INPUT, PipelineError, PipelinedClient, read_request, write_register_request, write_registers_request
+
+_LOGGER = logging.getLogger(__name__)
+
+class ModbusConnection():
+    """ One TCP connection to a Modbus gateway, shared by all units behind it.
+
+    Requests are serialized with a lock, since many gateways only handle one
+    request at a time. With a pipeline depth above 1, up to that many requests
+    are kept in flight instead, until the gateway gets one wrong. Then we fall
+    back to serialized requests for good.
+    """
+    def __init__(self, host:str, port:int, pipeline_depth:int = 1):
+        self.Host = host
+        self.Port = port
+        self.PipelineDepth = pipeline_depth
+        self.RefCount = 0
+        self.Connects = 0
+        self._client = AsyncModbusTcpClient(host=host, port=port)
+        self._lock = asyncio.Lock()
+        self._pipeline = PipelinedClient(host, port, pipeline_depth) if pipeline_depth > 1 else None
+
+    @property
+    def connected(self) -> bool:
+        if self._pipeline is not None:
+            return self._pipeline.connected
+        return self._client.connected
+
+    @property
+    def Pipelined(self) -> bool:
+        return self._pipeline is not None
+
+    @property
+    def Reconnects(self) -> int:
+        connects = self.Connects
+        if self._pipeline is not None:
+            connects += self._pipeline.Connects
+        return max(0, connects - 1)
+
+    async def connect(self):
+        if self._pipeline is not None:
+            await self._pipeline.connect()
+            return
+        # The async client does not connect on first request, so we do it here
+        if not self._client.connected:
+            _LOGGER.debug("Connecting to %s:%s", self.Host, self.Port)
+            self.Connects += 1
+            await self._client.connect()
+            if not self._client.connected:
+                raise ConnectionException('Unable to connect to {}:{}'.format(self.Host, self.Port))
+
+    def close(self):
+        if self._pipeline is not None:
+            self._pipeline.close()
+        self._client.close()
+
+    async def execute(self, serial, device_id:int, pdu:bytes):
+        # Pipelined if enabled, otherwise one request at a time with the pymodbus client
+        if self._pipeline is not None:
+            try:
+                return await self._pipeline.execute(device_id, pdu)
+            except PipelineError as err:
+                if self._pipeline is not None:
+                    _LOGGER.warning("Gateway %s:%s does not handle pipelined requests, sending one at a time: %s", self.Host, self.Port, err)
+                    self.Connects += self._pipeline.Connects
+                    self._pipeline.close()
+                    self._pipeline = None
+
+        async with self._lock:
+            await self.connect()
+            return await serial()
+
+    async def read_input_registers(self, address:int, count:int, device_id:int):
+        return await self.execute(lambda: self._client.read_input_registers(address=address, count=count, device_id=device_id),
+                                  device_id, read_request(FC_READ_INPUT, address, count))
+
+    async def read_holding_registers(self, address:int, count:int, device_id:int):
+        return await self.execute(lambda: self._client.read_holding_registers(address=address, count=count, device_id=device_id),
+                                  device_id, read_request(FC_READ_HOLDING, address, count))
+
+    async def write_register(self, address:int, value:int, device_id:int):
+        return await self.execute(lambda: self._client.write_register(address=address, value=value, device_id=device_id),
+                                  device_id, write_register_request(address, value))
+
+    async def write_registers(self, address:int, values:list, device_id:int):
+        return await self.execute(lambda: self._client.write_registers(address=address, values=values, device_id=device_id),
+                                  device_id, write_registers_request(address, values))
+
+class ConnectionPool():
+    """ Connections keyed by host:port, reference counted by the units using them """
+    def __init__(self):
+        self._connections = {}
+
+    def acquire(self, host:str, port:int, pipeline_depth:int = 1) -> ModbusConnection:
+        key = (host, port)
+        connection = self._connections.get(key)
+        if connection is None:
+            connection = ModbusConnection(host, port, pipeline_depth)
+            self._connections[key] = connection
+        elif connection.PipelineDepth != pipeline_depth:
+            _LOGGER.warning("Connection %s:%s is shared with a pipeline depth of %s, ignoring %s", host, port, connection.PipelineDepth, pipeline_depth)
+        connection.RefCount += 1
+        _LOGGER.debug("Acquired connection %s:%s (users: %s)", host, port, connection.RefCount)
+        return connection
+
+    def release(self, connection:ModbusConnection):
+        connection.RefCount -= 1
+        _LOGGER.debug("Released connection %s:%s (users: %s)", connection.Host, connection.Port, connection.RefCount)
+        if connection.RefCount <= 0:
+            self._connections.pop((connection.Host, connection.Port), None)
+            connection.close()
+
+# Shared by all Swegon instances
+POOL = ConnectionPool()
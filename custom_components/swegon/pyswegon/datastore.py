@@ -0,0 +1,106 @@
+from array import array
+from functools import partial
+
+import logging
+import struct
+
+from .codecs import STRING, encode_value
+from .registermaps import PointSpec, RegisterMap
+
+_LOGGER = logging.getLogger(__name__)
+
+class DatapointStore:
+    """ Values for one device: raw registers as received, and decoded values """
+    __slots__ = ("Map", "Raw", "_values")
+
+    def __init__(self, register_map:RegisterMap):
+        self.Map = register_map
+        self.Raw = array('H', bytes(2 * register_map.SlotCount))
+        self._values = [('' if point.Type == STRING else 0) for point in register_map.Points]
+
+    def get(self, point:PointSpec):
+        return self._values[point.Index]
+
+    def reader(self, point:PointSpec):
+        # Function returning the current value, bound once instead of looking it up on each read
+        return partial(self._values.__getitem__, point.Index)
+
+    def set(self, point:PointSpec, value):
+        if point.Count > 0:
+            self.Raw[point.Slot:point.Slot+point.Count] = array('H', encode_value(point, value))
+        self._values[point.Index] = value
+
+    def holds(self, point:PointSpec, value) -> bool:
+        """ True if the registers hold value, compared as registers so scaled floats need not match exactly """
+        if point.Count == 0:
+            return self._values[point.Index] == value
+        try:
+            registers = encode_value(point, value)
+        except (TypeError, ValueError, struct.error):
+            return False
+        return list(self.Raw[point.Slot:point.Slot+point.Count]) == registers
+
+    def snapshot(self, redacted=(), mask=None) -> dict:
+        # Raw registers for each register type, by start address. Registers of redacted points are replaced by mask.
+        snapshot = {mode: {"start": first, "registers": list(self.Raw[offset+first:offset+last])} for mode, (first, last, offset) in self.Map.Regions.items()}
+        for point in redacted:
+            if point.Count > 0:
+                first, last, offset = self.Map.Regions[point.Mode]
+                start = point.Slot - offset - first
+                snapshot[point.Mode]["registers"][start:start+point.Count] = [mask] * point.Count
+        return snapshot
+
+    def scatter(self, block, registers):
+        # Store a block read from the device, and decode all values in it
+        words = array('H', registers)
+        self.Raw[block.Slot:block.Slot+len(words)] = words
+        values = self._values
+        for index, value in zip(block.Table.Indexes, block.Table.decode(words)):
+            values[index] = value
+
+class Datapoint:
+    """ View of one datapoint, so Datapoints[group][key].Value works as before """
+    __slots__ = ("_store", "_point")
+
+    def __init__(self, store:DatapointStore, point:PointSpec):
+        self._store = store
+        self._point = point
+
+    @property
+    def Address(self) -> int:
+        return self._point.Address
+
+    @property
+    def Scaling(self) -> float:
+        return self._point.Scaling
+
+    @property
+    def Count(self) -> int:
+        return self._point.Count
+
+    @property
+    def Type(self) -> str:
+        return self._point.Type
+
+    @property
+    def Access(self) -> str:
+        return self._point.Access
+
+    @property
+    def Publish(self):
+        return self._point.Publish
+
+    @property
+    def Point(self) -> PointSpec:
+        return self._point
+
+    @property
+    def Value(self):
+        return self._store.get(self._point)
+
+    @Value.setter
+    def Value(self, value):
+        self._store.set(self._point, value)
+
+def build_views(store:DatapointStore) -> dict:
+    return {group: {key: Datapoint(store, point) for key, point in points.items()} for group, points in store.Map.Groups.items()}
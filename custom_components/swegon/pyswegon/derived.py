@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Air at room temperature
+AIR_DENSITY = 1.2               # kg/m³
+AIR_HEAT_CAPACITY = 1006        # J/(kg·K)
+
+# Below this, temperature differences are mostly sensor noise
+MIN_TEMPERATURE_DIFFERENCE = 0.5    # K
+
+# Below this, fans are considered stopped
+MIN_FLOW = 1.0                  # m³/h
+
+# Energy is not integrated over gaps longer than this, the unit was not polled
+MAX_INTEGRATION_GAP = 3600      # Seconds
+
+@dataclass(frozen=True)
+class DerivedMetric:
+    """ A value calculated from other datapoints.
+
+    Function is called with the map constants and the input values, and returns
+    the new value, or None if the inputs make no sense. With Integrate set, the
+    metric is the time integral of its single input in kWh, with the input in W.
+    Negative input, like cooling in summer, counts as zero, so the total never decreases.
+    """
+    Group: str
+    Key: str
+    Inputs: tuple               # (group, key) of datapoints or other metrics
+    Function: object = None
+    Integrate: bool = False
+
+""" ******************************************************* """
+""" ********************* METRICS ************************* """
+""" ******************************************************* """
+def heat_exchanger_efficiency(constants, fresh, supply, extract):
+    # Temperature efficiency, from supply air after the heat exchanger
+    if abs(extract - fresh) < MIN_TEMPERATURE_DIFFERENCE:
+        return None
+    return round((supply - fresh) / (extract - fresh) * 100, 1)
+
+def recovered_heat(constants, fresh, supply, flow):
+    # Heat added to the supply air by the heat exchanger, in W
+    if flow < MIN_FLOW:
+        return 0
+    return round(AIR_DENSITY * AIR_HEAT_CAPACITY * flow / 3600 * (supply - fresh))
+
+def specific_fan_power(constants, supply_fan, exhaust_fan, supply_flow, exhaust_flow):
+    # Estimated from fan outputs, fan power goes with the cube of fan speed. In kW/(m³/s).
+    flow = max(supply_flow, exhaust_flow)
+    nominal = constants.get("Nominal_Fan_Power")
+    if flow < MIN_FLOW or not nominal:
+        return None
+    power = nominal * ((supply_fan / 100) ** 3 + (exhaust_fan / 100) ** 3)
+    return round(power / (flow / 3600) / 1000, 2)
+
+""" ******************************************************* """
+""" ********************** ENGINE ************************* """
+""" ******************************************************* """
+def dependencies(metrics) -> dict:
+    """ (group, key) of each metric -> all datapoints and metrics it is calculated from """
+    inputs = {(metric.Group, metric.Key): metric.Inputs for metric in metrics}
+
+    def expand(name, seen):
+        for dependency in inputs.get(name, ()):
+            if dependency not in seen:
+                seen.append(dependency)
+                expand(dependency, seen)
+        return seen
+    return {name: tuple(expand(name, [])) for name in inputs}
+
+class DerivedMetrics:
+    """ Calculates metrics in declaration order, each only when one of its inputs changed """
+    def __init__(self, store, metrics, constants:dict):
+        self._store = store
+        self._constants = constants
+        self._metrics = []
+        self._lastInputs = []
+        self._integrals = {}        # Metric index -> (time, input value) at last update
+
+        points = {(point.Group, point.Key): point for point in store.Map.Points}
+        for metric in metrics:
+            if (metric.Group, metric.Key) not in points:
+                _LOGGER.debug("No datapoint for derived metric %s - %s", metric.Group, metric.Key)
+                continue
+            inputs = [points.get(name) for name in metric.Inputs]
+            if None in inputs:
+                _LOGGER.debug("Missing inputs for derived metric %s - %s", metric.Group, metric.Key)
+                continue
+            self._metrics.append((metric, points[(metric.Group, metric.Key)], inputs))
+            self._lastInputs.append(None)
+
+    def update(self, now:float, wanted=None) -> int:
+        """ Recalculate metrics with changed inputs. wanted(point) limits the metrics calculated. """
+        store = self._store
+        calculated = 0
+        for index, (metric, point, inputs) in enumerate(self._metrics):
+            if wanted is not None and not wanted(point):
+                continue
+            values = tuple(store.get(input) for input in inputs)
+
+            if metric.Integrate:
+                self.integrate(index, point, values[0], now)
+                calculated += 1
+                continue
+
+            if values == self._lastInputs[index]:
+                continue
+            self._lastInputs[index] = values
+            calculated += 1
+            if None in values:
+                value = None
+            else:
+                try:
+                    value = metric.Function(self._constants, *values)
+                except (ArithmeticError, TypeError) as err:
+                    _LOGGER.debug("Unable to calculate %s - %s: %s", metric.Group, metric.Key, repr(err))
+                    value = None
+            store.set(point, value)
+        return calculated
+
+    def integrate(self, index:int, point, power, now:float):
+        # Power is held from the last update until now, and only adds to the total
+        last = self._integrals.get(index)
+        self._integrals[index] = (now, power)
+        if last is None or last[1] is None:
+            return
+        elapsed = now - last[0]
+        if 0 < elapsed <= MAX_INTEGRATION_GAP:
+            energy = self._store.get(point) or 0
+            self._store.set(point, energy + max(0, last[1]) * elapsed / 3600000)
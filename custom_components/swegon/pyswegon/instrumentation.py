@@ -0,0 +1,79 @@
+from bisect import bisect_left
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of latency buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+class Histogram:
+    """ Fixed bucket histogram, cheap enough to update on every transaction """
+    __slots__ = ("Buckets", "Counts", "Count", "Sum", "Max")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.Buckets = buckets
+        self.Counts = [0] * (len(buckets) + 1)
+        self.Count = 0
+        self.Sum = 0.0
+        self.Max = 0.0
+
+    def observe(self, value:float):
+        self.Counts[bisect_left(self.Buckets, value)] += 1
+        self.Count += 1
+        self.Sum += value
+        if value > self.Max:
+            self.Max = value
+
+    @property
+    def mean(self) -> float:
+        return self.Sum / self.Count if self.Count else 0.0
+
+    def quantile(self, q:float) -> float:
+        # Upper bound of the bucket holding the q quantile
+        if not self.Count:
+            return 0.0
+        rank = q * self.Count
+        seen = 0
+        for bound, count in zip(self.Buckets, self.Counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.Max)
+        return self.Max
+
+    def asDict(self) -> dict:
+        return {
+            "count": self.Count,
+            "mean": self.mean,
+            "max": self.Max,
+            "buckets": {str(bound): count for bound, count in zip(self.Buckets + ("inf",), self.Counts)},
+        }
+
+class DeviceStats:
+    """ Counters for the Modbus traffic of one device """
+    def __init__(self):
+        self.Transactions = 0
+        self.Latency = Histogram()
+        self.Errors = {}            # Per group
+        self.Timeouts = {}          # Per group
+        self.DecodeTime = 0.0
+        self.DecodedRegisters = 0
+
+    def transaction(self, latency:float):
+        self.Transactions += 1
+        self.Latency.observe(latency)
+
+    def error(self, groups, timeout:bool):
+        counters = self.Timeouts if timeout else self.Errors
+        for group in groups:
+            counters[group] = counters.get(group, 0) + 1
+
+    def asDict(self) -> dict:
+        return {
+            "transactions": self.Transactions,
+            "latency": self.Latency.asDict(),
+            "errors": dict(self.Errors),
+            "timeouts": dict(self.Timeouts),
+            "decode_time": self.DecodeTime,
+            "decoded_registers": self.DecodedRegisters,
+        }
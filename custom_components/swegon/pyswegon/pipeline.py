@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import struct
+
+from pymodbus.exceptions import ConnectionException, ModbusIOException
+
+_LOGGER = logging.getLogger(__name__)
+
+# Function codes
+FC_READ_HOLDING = 3
+FC_READ_INPUT = 4
+FC_WRITE_REGISTER = 6
+FC_WRITE_REGISTERS = 16
+
+DEFAULT_TIMEOUT = 3     # Seconds
+
+class PipelineError(ModbusIOException):
+    """ The gateway does not handle several requests in flight, requests should be sent one at a time """
+
+class ModbusResponse:
+    """ Decoded response, with the parts of pymodbus responses we use """
+    __slots__ = ("function_code", "registers", "exception_code")
+
+    def __init__(self, function_code:int, registers:list = None, exception_code:int = None):
+        self.function_code = function_code
+        self.registers = registers or []
+        self.exception_code = exception_code
+
+    def isError(self) -> bool:
+        return self.exception_code is not None
+
+    def __str__(self):
+        if self.isError():
+            return "Exception response (function code {}, exception code {})".format(self.function_code, self.exception_code)
+        return "Response (function code {}, {} registers)".format(self.function_code, len(self.registers))
+
+def read_request(function_code:int, address:int, count:int) -> bytes:
+    return struct.pack('>BHH', function_code, address, count)
+
+def write_register_request(address:int, value:int) -> bytes:
+    return struct.pack('>BHH', FC_WRITE_REGISTER, address, value & 0xFFFF)
+
+def write_registers_request(address:int, values:list) -> bytes:
+    return struct.pack('>BHHB{}H'.format(len(values)), FC_WRITE_REGISTERS, address, len(values), 2 * len(values), *[v & 0xFFFF for v in values])
+
+def decode_response(pdu:bytes) -> ModbusResponse:
+    function_code = pdu[0]
+    if function_code & 0x80:
+        return ModbusResponse(function_code & 0x7F, exception_code=pdu[1])
+    if function_code in (FC_READ_HOLDING, FC_READ_INPUT):
+        count = pdu[1] // 2
+        return ModbusResponse(function_code, list(struct.unpack_from('>{}H'.format(count), pdu, 2)))
+    return ModbusResponse(function_code)
+
+class PipelinedClient:
+    """ Modbus TCP client keeping several requests in flight on one socket.
+
+    Responses are matched to requests by transaction id. Anything that does not
+    match, or a request timing out while others to the same unit are in flight, is
+    taken as a sign that the gateway can not pipeline. Then all pending requests,
+    and any made later, fail with PipelineError.
+    """
+    def __init__(self, host:str, port:int, depth:int, timeout:float = DEFAULT_TIMEOUT):
+        self.Host = host
+        self.Port = port
+        self.Connects = 0
+        self.Failed = False
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(depth)
+        self._connectLock = asyncio.Lock()
+        self._reader = None
+        self._writer = None
+        self._readTask = None
+        self._pending = {}          # Transaction id -> (future, unit, function code)
+        self._expired = set()       # Transaction ids that timed out, late responses are dropped
+        self._tid = 0
+
+    @property
+    def connected(self) -> bool:
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def connect(self):
+        async with self._connectLock:
+            if self.connected:
+                return
+            _LOGGER.debug("Connecting to %s:%s (pipelined)", self.Host, self.Port)
+            self.Connects += 1
+            try:
+                self._reader, self._writer = await asyncio.wait_for(asyncio.open_connection(self.Host, self.Port), self._timeout)
+            except (OSError, asyncio.TimeoutError) as err:
+                raise ConnectionException('Unable to connect to {}:{}: {}'.format(self.Host, self.Port, err))
+            self._expired.clear()
+            self._readTask = asyncio.ensure_future(self._readLoop(self._reader))
+
+    def close(self):
+        if self._readTask is not None:
+            self._readTask.cancel()
+            self._readTask = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail(ModbusIOException("Connection to {}:{} closed".format(self.Host, self.Port)))
+
+    def _fail(self, error:Exception):
+        for future, unit, function_code in self._pending.values():
+            if not future.done():
+                future.set_exception(error)
+        self._pending.clear()
+
+    def _shared(self, unit:int) -> bool:
+        return any(pending_unit == unit for future, pending_unit, function_code in self._pending.values())
+
+    def _misbehaved(self, reason:str):
+        _LOGGER.debug("Pipelining to %s:%s failed: %s", self.Host, self.Port, reason)
+        self.Failed = True
+        error = PipelineError(reason)
+        self._fail(error)
+        self.close()
+        return error
+
+    async def execute(self, unit:int, pdu:bytes) -> ModbusResponse:
+        async with self._slots:
+            if self.Failed:
+                raise PipelineError("Pipelining to {}:{} has failed".format(self.Host, self.Port))
+            await self.connect()
+            self._tid = (self._tid + 1) & 0xFFFF
+            tid = self._tid
+            shared = self._shared(unit)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[tid] = (future, unit, pdu[0])
+            self._writer.write(struct.pack('>HHHB', tid, 0, len(pdu) + 1, unit) + pdu)
+
+            try:
+                return decode_response(await asyncio.wait_for(future, self._timeout))
+            except asyncio.TimeoutError:
+                self._pending.pop(tid, None)
+                if self.Failed:
+                    raise PipelineError("Pipelining to {}:{} has failed".format(self.Host, self.Port))
+                if shared or self._shared(unit):
+                    raise self._misbehaved("Request timed out with other requests to unit {} in flight".format(unit))
+                self._expired.add(tid)
+                raise ModbusIOException("Request to {}:{} unit {} timed out".format(self.Host, self.Port, unit))
+            finally:
+                self._pending.pop(tid, None)
+
+    async def _readLoop(self, reader):
+        try:
+            while True:
+                tid, protocol, length, unit = struct.unpack('>HHHB', await reader.readexactly(7))
+                if protocol != 0 or length < 3 or length > 254:
+                    self._misbehaved("Malformed response header")
+                    return
+                pdu = await reader.readexactly(length - 1)
+
+                entry = self._pending.get(tid)
+                if entry is None:
+                    if tid in self._expired:
+                        self._expired.discard(tid)
+                        continue
+                    self._misbehaved("Response with unknown transaction id {}".format(tid))
+                    return
+                future, expected_unit, function_code = entry
+                if unit != expected_unit or (pdu[0] & 0x7F) != function_code:
+                    self._misbehaved("Response does not match request {}".format(tid))
+                    return
+                if not future.done():
+                    future.set_result(pdu)
+        except asyncio.CancelledError:
+            raise
+        except (asyncio.IncompleteReadError, OSError) as err:
+            _LOGGER.debug("Connection to %s:%s lost: %s", self.Host, self.Port, repr(err))
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail(ModbusIOException("Connection to {}:{} lost".format(self.Host, self.Port)))
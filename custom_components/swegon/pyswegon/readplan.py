@@ -0,0 +1,48 @@
+from dataclasses import dataclass, field
+
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus allows max 125 registers in one read request
+MAX_REGISTERS = 125
+
+# Max number of unused registers we accept to read to avoid a new request
+DEFAULT_MAX_GAP = 16
+
+@dataclass
+class ReadBlock:
+    Mode: int
+    Address: int
+    Count: int = 0
+    Targets: list = field(default_factory=list)    # (point, offset into block)
+    Slot: int = 0                                   # Position in the raw register vector
+    Table: object = None                            # Decode table for the block
+    Groups: tuple = ()                              # Groups with datapoints in the block
+
+def compile_read_plan(points, max_gap:int = DEFAULT_MAX_GAP, max_count:int = MAX_REGISTERS) -> list:
+    """ Merge datapoints into as few read requests as possible.
+
+    points is an iterable of objects with Mode, Address and Count. Points with the same
+    mode are sorted by address, and merged into one block as long as the gap between
+    them is at most max_gap registers and the block does not exceed max_count registers.
+    """
+    plan = []
+    block = None
+
+    for point in sorted(points, key=lambda p: (p.Mode, p.Address)):
+        start = point.Address
+        end = point.Address + point.Count
+
+        if block is not None and block.Mode == point.Mode:
+            gap = start - (block.Address + block.Count)
+            if gap <= max_gap and (end - block.Address) <= max_count:
+                block.Count = max(block.Count, end - block.Address)
+                block.Targets.append((point, start - block.Address))
+                continue
+
+        block = ReadBlock(point.Mode, start, point.Count, [(point, 0)])
+        plan.append(block)
+
+    _LOGGER.debug("Compiled read plan: %s", [(b.Address, b.Count) for b in plan])
+    return plan
@@ -0,0 +1,269 @@
+from dataclasses import dataclass
+
+import glob
+import json
+import logging
+import os
+
+from .codecs import INT16, INT32, UINT16, STRING, FORMATS, DecodeTable, register_count
+from .readplan import DEFAULT_MAX_GAP, compile_read_plan
+
+_LOGGER = logging.getLogger(__name__)
+
+# Register maps are JSON files, compiled once per model when first used
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+
+MODE_LOCAL = 0          # Calculated, not read from the device
+MODE_INPUT = 3
+MODE_HOLDING = 4
+
+MODES = {"local": MODE_LOCAL, "input": MODE_INPUT, "holding": MODE_HOLDING}
+DEFAULT_ACCESS = {MODE_LOCAL: "r", MODE_INPUT: "r", MODE_HOLDING: "rw"}
+
+# When a new value is sent on to Home Assistant
+@dataclass(frozen=True, slots=True)
+class PublishPolicy:
+    Deadband: float = 0         # Change from the last published value needed to publish ...
+    Relative: float = 0         # ... or this fraction of the last published value, if larger
+    MinInterval: float = 0      # Seconds between publishing changes
+    MaxInterval: float = 0      # Seconds after which a change inside the deadband is published, 0 for never
+
+PUBLISH_ALWAYS = PublishPolicy()
+
+# Static definition of a datapoint, values are kept in a DatapointStore
+@dataclass(frozen=True, slots=True)
+class Modbus_Datapoint:
+    Address: int
+    Scaling: float = 1
+    Count: int = 1      # Number of registers, used for strings
+    Type: str = INT16
+    Access: str = "r"   # "r" or "rw"
+    Publish: PublishPolicy = PUBLISH_ALWAYS
+
+@dataclass(frozen=True, slots=True)
+class GroupDefinition:
+    Mode: int
+    Poll: str | None    # Polling class, groups in the same class are read together
+    Points: dict        # Key -> Modbus_Datapoint
+
+@dataclass(frozen=True, slots=True)
+class PointSpec:
+    Index: int          # Position in the value vector
+    Group: str
+    Key: str
+    Address: int
+    Scaling: float
+    Type: str
+    Count: int          # Number of registers, 0 for local (virtual) values
+    Mode: int
+    Slot: int           # Position in the raw register vector
+    Access: str
+    Publish: PublishPolicy
+
+class RegisterMap:
+    """ Static register layout for one device model.
+
+    Built once per model and shared by all devices of that model. Raw registers are
+    laid out by address, one region per register type, so a block read is stored
+    with one slice assignment.
+    """
+    def __init__(self, model:str, definitions:dict, constants:dict = None):
+        self.Model = model
+        self.Constants = dict(constants or {})    # Model properties, like nominal fan power
+        self.Groups = {}
+        self.Points = []
+        self.Plans = {}
+        self.Modes = {group: definition.Mode for group, definition in definitions.items()}
+
+        # Groups in each polling class
+        self.Polls = {}
+        for group, definition in definitions.items():
+            if definition.Poll is not None:
+                self.Polls.setdefault(definition.Poll, ())
+                self.Polls[definition.Poll] += (group,)
+
+        registers = []
+        for group, definition in definitions.items():
+            for key, data in definition.Points.items():
+                local = definition.Mode == MODE_LOCAL
+                registers.append((local, definition.Mode, data.Address, group, key, data))
+        registers.sort(key=lambda r: r[:3])
+
+        # Find address range for each register type
+        regions = {}
+        for local, mode, address, group, key, data in registers:
+            if not local:
+                first, last = regions.get(mode, (address, address))
+                regions[mode] = (min(first, address), max(last, address + register_count(data.Type, data.Count)))
+
+        offsets = {}
+        self.Regions = {}
+        self.SlotCount = 0
+        for mode, (first, last) in regions.items():
+            offsets[mode] = self.SlotCount - first
+            self.Regions[mode] = (first, last, offsets[mode])
+            self.SlotCount += last - first
+
+        for index, (local, mode, address, group, key, data) in enumerate(registers):
+            count = 0 if local else register_count(data.Type, data.Count)
+            slot = 0 if local else offsets[mode] + address
+            self.Points.append(PointSpec(index, group, key, address, data.Scaling, data.Type, count, mode, slot, data.Access, data.Publish))
+
+        # Keep the group and key order from the definitions
+        byName = {(point.Group, point.Key): point for point in self.Points}
+        for group, definition in definitions.items():
+            self.Groups[group] = {key: byName[(group, key)] for key in definition.Points}
+
+        # Datapoints by register type and address
+        self.Addresses = {(point.Mode, point.Address): point for point in self.Points if point.Count > 0}
+
+        _LOGGER.debug("Register map for %s with %s points and %s registers", model, len(self.Points), self.SlotCount)
+
+    def readPlan(self, groups, max_gap:int = DEFAULT_MAX_GAP) -> list:
+        # Blocks to read for a set of groups, compiled on first use
+        key = (tuple(groups), max_gap)
+        plan = self.Plans.get(key)
+        if plan is None:
+            points = []
+            for group in groups:
+                if self.Modes[group] != MODE_LOCAL:
+                    points.extend(self.Groups[group].values())
+            plan = self.compilePlan(points, max_gap)
+            self.Plans[key] = plan
+        return plan
+
+    def valuePlan(self, point:PointSpec, max_gap:int = DEFAULT_MAX_GAP) -> list:
+        key = ("Value", point.Index)
+        plan = self.Plans.get(key)
+        if plan is None:
+            plan = self.compilePlan([point], max_gap)
+            self.Plans[key] = plan
+        return plan
+
+    def compilePlan(self, points, max_gap:int = DEFAULT_MAX_GAP) -> list:
+        plan = compile_read_plan(points, max_gap)
+        for block in plan:
+            self.compileBlock(block)
+        return plan
+
+    def compileBlock(self, block):
+        # Attach raw slot and decode table to a block in a read plan
+        point, offset = block.Targets[0]
+        block.Slot = point.Slot - offset
+        block.Table = DecodeTable(block.Targets)
+        block.Groups = tuple(dict.fromkeys(point.Group for point, offset in block.Targets))
+
+""" ******************************************************* """
+""" ******************* LOAD AND COMPILE ****************** """
+""" ******************************************************* """
+# Compiled maps by model name, and map file by model name
+_REGISTER_MAPS = {}
+_MODELS = None
+
+def list_models() -> dict:
+    """ Model name -> map file, for all maps with a model name """
+    global _MODELS
+    if _MODELS is None:
+        models = {}
+        for path in sorted(glob.glob(os.path.join(MAPS_DIR, "*.json"))):
+            with open(path, "rb") as file:
+                model = json.loads(file.read()).get("model")
+            if model:
+                models[model] = os.path.splitext(os.path.basename(path))[0]
+        _MODELS = models
+    return _MODELS
+
+def get_register_map(model:str) -> RegisterMap:
+    register_map = _REGISTER_MAPS.get(model)
+    if register_map is None:
+        register_map = load_register_map(model)
+        _REGISTER_MAPS[model] = register_map
+    return register_map
+
+def load_register_map(model:str) -> RegisterMap:
+    """ Compile the map for a model, with the maps it extends """
+    name = list_models().get(model)
+    if name is None:
+        raise ValueError("No register map for model: {}".format(model))
+    return compile_register_map(model, resolve_map(name))
+
+def resolve_map(name:str, seen:tuple = ()) -> dict:
+    """ Load a map file and the maps it extends, merged """
+    if name in seen:
+        raise ValueError("Register map {} extends itself".format(name))
+
+    with open(os.path.join(MAPS_DIR, name + ".json"), "rb") as file:
+        source = json.loads(file.read())
+
+    base = source.get("extends")
+    if base is None:
+        return merge_map({"groups": {}}, source)
+    return merge_map(resolve_map(base, seen + (name,)), source)
+
+def merge_map(base:dict, source:dict) -> dict:
+    """ Apply a map on top of the map it extends. Groups and points set to null are removed. """
+    groups = {group: dict(definition, points=dict(definition["points"])) for group, definition in base["groups"].items()}
+
+    for group, definition in source.get("groups", {}).items():
+        if definition is None:
+            groups.pop(group, None)
+            continue
+        merged = groups.setdefault(group, {"points": {}})
+        merged.update({field: value for field, value in definition.items() if field != "points"})
+        for key, point in definition.get("points", {}).items():
+            if point is None:
+                merged["points"].pop(key, None)
+                continue
+            if not isinstance(point, dict):
+                point = {"address": point}
+            merged["points"][key] = dict(merged["points"].get(key, {}), **point)
+
+    constants = dict(base.get("constants", {}), **source.get("constants", {}))
+    return {"model": source.get("model"), "constants": constants, "groups": groups}
+
+def default_deadband(data_type:str, scaling:float, access:str) -> float:
+    """ Scaled measurements change by more than one step before they are published, so they do not flip between adjacent steps """
+    if "w" not in access and data_type in (INT16, UINT16, INT32) and scaling < 1:
+        return 1.5 * scaling
+    return 0
+
+def parse_publish(data_type:str, scaling:float, access:str, settings:dict) -> PublishPolicy:
+    """ Publish policy from "publish" settings of a group and point, with defaults from the data type """
+    policy = PublishPolicy(
+        settings.get("deadband", default_deadband(data_type, scaling, access)),
+        settings.get("relative", 0),
+        settings.get("min_interval", 0),
+        settings.get("max_interval", 0),
+    )
+    return PUBLISH_ALWAYS if policy == PUBLISH_ALWAYS else policy
+
+def parse_groups(groups:dict) -> dict:
+    """ Datapoint definitions from a merged map """
+    definitions = {}
+    for group, definition in groups.items():
+        mode = MODES[definition.get("mode", "input")]
+        points = {}
+        for key, point in definition["points"].items():
+            data_type = point.get("type", INT16)
+            if data_type not in FORMATS and data_type != STRING:
+                raise ValueError("Unknown type {} for {} - {}".format(data_type, group, key))
+            scaling = point.get("scaling", 1)
+            access = point.get("access", DEFAULT_ACCESS[mode])
+            points[key] = Modbus_Datapoint(
+                point.get("address", 0),
+                scaling,
+                point.get("count", 1),
+                data_type,
+                access,
+                parse_publish(data_type, scaling, access, dict(definition.get("publish", {}), **point.get("publish", {}))),
+            )
+        definitions[group] = GroupDefinition(mode, definition.get("poll"), points)
+    return definitions
+
+def compile_register_map(model:str, source:dict) -> RegisterMap:
+    register_map = RegisterMap(model, parse_groups(source["groups"]), source.get("constants"))
+
+    # Read plans for each polling class are compiled up front
+    for groups in register_map.Polls.values():
+        register_map.readPlan(groups)
+    return register_map
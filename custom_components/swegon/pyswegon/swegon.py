@@ -1,17 +1,19 @@
-from dataclasses import dataclass
-
+import asyncio
 import logging
+import time
 
-from pymodbus.client import ModbusTcpClient
-from pymodbus.exceptions import ModbusException
+from pymodbus.exceptions import ModbusException, ModbusIOException
 
-_LOGGER = logging.getLogger(__name__)
+from .codecs import encode_value
+from .connection import POOL
+from .datastore import DatapointStore, build_views
+from .derived import DerivedMetric, DerivedMetrics, dependencies, heat_exchanger_efficiency, recovered_heat, specific_fan_power
+from .instrumentation import DeviceStats
+from .readplan import DEFAULT_MAX_GAP
+from .registermaps import MODE_LOCAL, MODE_INPUT, MODE_HOLDING, Modbus_Datapoint, get_register_map, list_models
+from .writequeue import DEFAULT_WRITE_WINDOW, WriteQueue
 
-@dataclass
-class Modbus_Datapoint:
-    Address: int
-    Scaling: float = 1
-    Value: float = 0
+_LOGGER = logging.getLogger(__name__)
 
 # ENUMS FOR GROUPS
 COMMANDS = "Commands"
@@ -24,44 +26,119 @@ VIRTUALSENSORS = "VirtualSensors"
 UNIT_STATUSES = "UnitStatuses"
 CONFIG = "Config"
 
-MODE_INPUT = 3
-MODE_HOLDING = 4
+# Calculated values, in the order they are calculated
+DERIVED_METRICS = (
+    DerivedMetric(VIRTUALSENSORS, "Efficiency", ((SENSORS, "Fresh_Temp"), (SENSORS, "Supply_Temp1"), (SENSORS, "Extract_Temp")), heat_exchanger_efficiency),
+    DerivedMetric(VIRTUALSENSORS, "Recovered_Heat", ((SENSORS, "Fresh_Temp"), (SENSORS, "Supply_Temp1"), (SENSORS, "Supply_Flow")), recovered_heat),
+    DerivedMetric(VIRTUALSENSORS, "Specific_Fan_Power", ((UNIT_STATUSES, "Supply_Fan"), (UNIT_STATUSES, "Exhaust_Fan"), (SENSORS, "Supply_Flow"), (SENSORS, "Exhaust_Flow")), specific_fan_power),
+    DerivedMetric(VIRTUALSENSORS, "Recovered_Energy", ((VIRTUALSENSORS, "Recovered_Heat"),), Integrate=True),
+)
+
+# Datapoints each calculated value is made from
+VIRTUAL_DEPENDENCIES = dependencies(DERIVED_METRICS)
 
 class Swegon():
-    def __init__(self, device_module:str, host:str, port:int, slave_id:int):
-        self._client = ModbusTcpClient(host=host, port=port)
-        self._slave_id = slave_id
+    def __init__(self, device_module:str, host:str, port:int, slave_id:int, max_gap:int = DEFAULT_MAX_GAP, write_window:float = DEFAULT_WRITE_WINDOW, pipeline_depth:int = 1):
+        self._device_module = device_module
+        self._max_gap = max_gap
+        self._pipeline_depth = pipeline_depth
 
         # Load correct datapoints
         self.load_datapoints(device_module)
 
+        # Point indexes read from the device, None for all. Read plans for them by groups.
+        self._wanted = None
+        self._plans = {}
+
+        self._host = host
+        self._port = port
+        self._client = POOL.acquire(host, port, pipeline_depth)
+        self._closed = False
+        self._slave_id = slave_id
+
+        # Writes within a short window are sent together
+        self._writes = WriteQueue(self.writeRun, write_window)
+
+        # Latency, errors and decode time
+        self.Stats = DeviceStats()
+
+    async def connect(self):
+        await self.connection().connect()
+
+    def connection(self):
+        # Take back a connection given up by suspend()
+        if self._client is None and not self._closed:
+            self._client = POOL.acquire(self._host, self._port, self._pipeline_depth)
+        return self._client
+
+    @property
+    def PipelineDepth(self) -> int:
+        # Set by the first unit on the gateway, when the connection is shared
+        return self._client.PipelineDepth if self._client is not None else self._pipeline_depth
+
+    def suspend(self):
+        # Give back our connection while the unit is not responding
+        if self._client is not None:
+            POOL.release(self._client)
+            self._client = None
+
+    def close(self):
+        # Give back our connection, it is closed when the last unit is gone
+        self._closed = True
+        self._writes.cancel()
+        self.suspend()
+
 
     def load_datapoints(self, device_module:str):
-        module_name = f"{device_module.lower().replace(' ', '_')}"
-
-        if module_name == 'casa_r4':
-            from .devices.casa_r4 import CasaR4
-            self.Datapoints = CasaR4().Datapoints
-        elif module_name == 'casa_r15':
-            from .devices.casa_r15 import CasaR15
-            self.Datapoints = CasaR15().Datapoints
-        else:
-            self.Datapoints = {}
+        self._store = DatapointStore(get_register_map(device_module))
+        self.Datapoints = build_views(self._store)
+        self._derived = DerivedMetrics(self._store, DERIVED_METRICS, self._store.Map.Constants)
 
-    def twos_complement(self, number) -> int:
-        if number >> 15:
-            return -((number^0xFFFF) + 1)
-        else:
-            return number
+    def getReader(self, group, key):
+        return self._store.reader(self.Datapoints[group][key].Point)
+
+    def hasValue(self, group, key, value) -> bool:
+        return self._store.holds(self.Datapoints[group][key].Point, value)
 
     def getMode(self, group) -> int:
-        # Used to determine if a group is holding registers or input registers
-        if group in (COMMANDS, SETPOINTS, CONFIG):
-            return MODE_HOLDING
-        elif group in (DEVICE_INFO, ALARMS, SENSORS, SENSORS2, UNIT_STATUSES):
-            return MODE_INPUT
-        else:
-            return MODE_INPUT     
+        return self._store.Map.Modes.get(group, MODE_INPUT)
+
+    def setWanted(self, keys) -> list:
+        """ Only read the datapoints in keys, (group, key) or (group, None) for all in a group.
+
+        Datapoints calculated values are made from are read as well. Returns the
+        points that were not read before.
+        """
+        wanted = set()
+        for group, key in keys:
+            if group not in self.Datapoints:
+                continue
+            if key is None or key not in self.Datapoints[group]:
+                names = [(group, name) for name in self.Datapoints[group]]
+            else:
+                names = [(group, key)]
+            for name in names:
+                for dependency, dependencyKey in (name,) + VIRTUAL_DEPENDENCIES.get(name, ()):
+                    wanted.add(self.Datapoints[dependency][dependencyKey].Point.Index)
+
+        wanted = frozenset(wanted)
+        previous = self._wanted
+        if wanted == previous:
+            return []
+        added = []
+        if previous is not None:
+            added = [point for point in self._store.Map.Points if point.Index in wanted and point.Index not in previous]
+        _LOGGER.debug("Reading %s of %s datapoints", len(wanted), len(self._store.Map.Points))
+        self._wanted = wanted
+        self._plans = {}
+        return added
+
+    def isWanted(self, group, key) -> bool:
+        return self._wanted is None or self.Datapoints[group][key].Point.Index in self._wanted
+
+    def getPollClasses(self) -> dict:
+        # Polling class -> groups, from the register map
+        return self._store.Map.Polls
 
     """ ******************************************************* """
     """ **************** GET COMPOSITE VALUES ***************** """
@@ -73,19 +150,17 @@ class Swegon():
         return '{}.{}.{}'.format(a,b,c)
 
     def getModelName(self) -> str:
-        name = ''.join(chr(value) for value in self.Datapoints[DEVICE_INFO]["Model_Name"].Value)
-        return name.rstrip('\x00')
+        return self.Datapoints[DEVICE_INFO]["Model_Name"].Value
 
     def getSerialNumber(self) -> str:
-        serial = ''.join(chr(value) for value in self.Datapoints[DEVICE_INFO]["Serial_Number"].Value)
-        return serial.rstrip('\x00')
+        return self.Datapoints[DEVICE_INFO]["Serial_Number"].Value
     
     def calcVirtualSensors(self):
-        fresh = self.Datapoints[SENSORS]["Fresh_Temp"].Value        # Outside temp
-        sup = self.Datapoints[SENSORS]["Supply_Temp1"].Value        # Temp before heater
-        extract = self.Datapoints[SENSORS]["Extract_Temp"].Value    # Extract temp
-        efficiency = ((sup - fresh) / (extract - fresh)) * 100
-        self.Datapoints[VIRTUALSENSORS]["Efficiency"].Value = round(efficiency, 1)
+        # Only values with changed inputs are calculated again, and only the ones we read inputs for
+        wanted = None
+        if self._wanted is not None:
+            wanted = lambda point: point.Index in self._wanted
+        self._derived.update(time.monotonic(), wanted)
 
     """ ******************************************************* """
     """ **************** READ GROUP OF VALUES ***************** """
@@ -97,27 +172,13 @@ class Swegon():
         await self.readGroup(SETPOINTS)
 
     async def readDeviceInfo(self):
-        # We read multiple input registers in one message
-        response = self._client.read_input_registers(address=6000, count=47, device_id=self._slave_id)
-
-        if response.isError():
-            raise ModbusException('{}'.format(response))
-        else:
-            self.Datapoints[DEVICE_INFO]["FW_Maj"].Value = response.registers[0]
-            self.Datapoints[DEVICE_INFO]["FW_Min"].Value = response.registers[1]
-            self.Datapoints[DEVICE_INFO]["FW_Build"].Value = response.registers[2]
-            self.Datapoints[DEVICE_INFO]["Par_Maj"].Value = response.registers[3]
-            self.Datapoints[DEVICE_INFO]["Par_Min"].Value = response.registers[4]
-            self.Datapoints[DEVICE_INFO]["Model_Name"].Value = response.registers[7:22]
-            self.Datapoints[DEVICE_INFO]["Serial_Number"].Value = response.registers[23:47]
+        await self.readGroup(DEVICE_INFO)
 
     async def readAlarms(self):
         await self.readGroup(ALARMS)
 
     async def readSensors(self):
-        await self.readGroup(SENSORS)
-        await self.readGroup(SENSORS2)
-        self.calcVirtualSensors()
+        await self.readGroups(SENSORS, SENSORS2)
 
     async def readUnitStatuses(self):
         await self.readGroup(UNIT_STATUSES)
@@ -126,59 +187,141 @@ class Swegon():
     """ ******************** READ GROUP *********************** """
     """ ******************************************************* """
     async def readGroup(self, group):
-        # We read multiple registers in one message
-        _LOGGER.debug("Reading group: %s", group)
-        n_reg = len(self.Datapoints[group])
-        first_key = next(iter(self.Datapoints[group]))
-        first_address = self.Datapoints[group][first_key].Address
-        
-        mode = self.getMode(group)
-        if mode == MODE_INPUT:
-            response = self._client.read_input_registers(address=first_address, count=n_reg, device_id=self._slave_id)
-        elif mode == MODE_HOLDING:
-            response = self._client.read_holding_registers(address=first_address, count=n_reg, device_id=self._slave_id)
-            
+        await self.readGroups(group)
+
+    async def readGroups(self, *groups):
+        # Read all groups using as few messages as possible
+        _LOGGER.debug("Reading groups: %s", groups)
+
+        plan = self.getReadPlan(groups)
+        if len(plan) > 1 and self.connection().Pipelined:
+            # All blocks in flight at once, the connection limits how many
+            await asyncio.gather(*(self.readBlock(block) for block in plan))
+        else:
+            for block in plan:
+                await self.readBlock(block)
+
+        self.calcVirtualSensors()
+
+    def getReadPlan(self, groups):
+        if self._wanted is None:
+            return self._store.Map.readPlan(groups, self._max_gap)
+
+        # Compiled for the wanted points, until they change
+        plan = self._plans.get(groups)
+        if plan is None:
+            points = [point for group in groups if self.getMode(group) != MODE_LOCAL
+                      for point in self._store.Map.Groups[group].values()]
+            wanted = [point for point in points if point.Index in self._wanted]
+            plan = self._store.Map.readPlan(groups, self._max_gap)
+            if len(wanted) < len(points):
+                # Unless leaving out points splits a block, and it takes more requests
+                filtered = self._store.Map.compilePlan(wanted, self._max_gap)
+                if len(filtered) <= len(plan):
+                    plan = filtered
+            self._plans[groups] = plan
+        return plan
+
+    def getValuePlan(self, point):
+        return self._store.Map.valuePlan(point, self._max_gap)
+
+    async def readBlock(self, block):
+        if block.Mode == MODE_INPUT:
+            request = self.connection().read_input_registers(address=block.Address, count=block.Count, device_id=self._slave_id)
+        elif block.Mode == MODE_HOLDING:
+            request = self.connection().read_holding_registers(address=block.Address, count=block.Count, device_id=self._slave_id)
+
+        response = await self.transaction(block.Groups, request)
+        self.scatterBlock(block, response.registers)
+
+    async def transaction(self, groups, request):
+        # Run one request, and record latency and errors
+        start = time.perf_counter()
+        try:
+            response = await request
+        except (ModbusIOException, asyncio.TimeoutError, asyncio.CancelledError):
+            self.Stats.error(groups, True)
+            raise
+        except Exception:
+            self.Stats.error(groups, False)
+            raise
+        self.Stats.transaction(time.perf_counter() - start)
+
         if response.isError():
+            self.Stats.error(groups, False)
             raise ModbusException('{}'.format(response))
-        else:
-            for (dataPointName, data), newVal in zip(self.Datapoints[group].items(), response.registers):
-                newVal_2 = self.twos_complement(newVal)
-                if data.Scaling == 1.0:
-                    data.Value = newVal_2
-                else:
-                    data.Value = newVal_2 * data.Scaling
-                
+        return response
+
+    def scatterBlock(self, block, registers):
+        # Put values from a block read back into the datapoints
+        start = time.perf_counter()
+        self._store.scatter(block, registers)
+        self.Stats.DecodeTime += time.perf_counter() - start
+        self.Stats.DecodedRegisters += len(registers)
+
+    def getReconnects(self) -> int:
+        return self._client.Reconnects if self._client is not None else 0
+
+    def getRegisterSnapshot(self, redacted=(), mask=None) -> dict:
+        # redacted: (group, key) of datapoints whose registers are masked
+        points = [self.Datapoints[group][key].Point for group, key in redacted if key in self.Datapoints.get(group, {})]
+        return self._store.snapshot(points, mask)
+
     """ ******************************************************* """
     """ **************** READ SINGLE VALUE ******************** """
     """ ******************************************************* """
+    async def probe(self):
+        # Cheapest possible check that the unit responds: one register
+        for block in self.getValuePlan(self.Datapoints[DEVICE_INFO]["FW_Maj"].Point):
+            await self.readBlock(block)
+
     async def readValue(self, group, key):
-        # We read single register
+        # We read single value
         _LOGGER.debug("Reading value: %s - %s", group, key)
+        for block in self.getValuePlan(self.Datapoints[group][key].Point):
+            await self.readBlock(block)
 
-        mode = self.getMode(group)
-
-        if mode == MODE_INPUT:
-            response = self._client.read_input_registers(address=self.Datapoints[group][key].Address, count=1, device_id=self._slave_id)
-        elif mode == MODE_HOLDING:
-            response = self._client.read_holding_registers(address=self.Datapoints[group][key].Address, count=1, device_id=self._slave_id)
-
-        if response.isError():
-            raise ModbusException('{}'.format(response))
-        else:
-            newVal_2 = self.twos_complement(response.registers[0])
-            self.Datapoints[group][key].Value = newVal_2 * self.Datapoints[group][key].Scaling
+    async def readValues(self, group, keys):
+        # Several values in a group, adjacent registers in one request
+        _LOGGER.debug("Reading values: %s - %s", group, keys)
+        points = [self.Datapoints[group][key].Point for key in keys]
+        for block in self._store.Map.compilePlan(points, self._max_gap):
+            await self.readBlock(block)
 
     """ ******************************************************* """
-    """ **************** WRITE SINGLE VALUE ******************* """
+    """ ******************** WRITE VALUES ********************* """
     """ ******************************************************* """
     async def writeValue(self, group, key, value):
-        # We write single holding register
+        # Queued, and sent together with writes to adjacent registers
         _LOGGER.debug("Writing value: %s - %s - %s", group, key, value)
-        scaledVal = round(value/self.Datapoints[group][key].Scaling)
-        scaledVal = self.twos_complement(scaledVal)
-        response = self._client.write_register(address=self.Datapoints[group][key].Address, value=scaledVal, device_id=self._slave_id)
+        point = self.Datapoints[group][key].Point
+        if "w" not in point.Access:
+            raise ValueError("{} - {} is read only".format(group, key))
+        return await self._writes.write(group, key, point, value, encode_value(point, value))
 
-        if response.isError():
-            raise ModbusException('{}'.format(response))
+    async def writeValues(self, group, values:dict):
+        # Write several values in the same group, in as few requests as possible
+        # Check and encode every value first, so nothing is queued if one is invalid
+        writes = []
+        for key, value in values.items():
+            point = self.Datapoints[group][key].Point
+            if "w" not in point.Access:
+                raise ValueError("{} - {} is read only".format(group, key))
+            writes.append((key, point, value, encode_value(point, value)))
+        futures = [self._writes.enqueue(group, key, point, value, registers) for key, point, value, registers in writes]
+        await self.flushWrites()
+        await asyncio.gather(*futures)
+
+    async def flushWrites(self):
+        # Send queued writes now, without waiting for the window
+        await self._writes.flush()
+
+    async def writeRun(self, run):
+        if len(run.Registers) == 1:
+            request = self.connection().write_register(address=run.Address, value=run.Registers[0], device_id=self._slave_id)
         else:
-            self.Datapoints[group][key].Value = value
+            request = self.connection().write_registers(address=run.Address, values=run.Registers, device_id=self._slave_id)
+
+        await self.transaction(run.Groups, request)
+        for write in run.Writes:
+            self.Datapoints[write.Group][write.Key].Value = write.Value
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+# Time to wait for more writes before sending, in seconds
+DEFAULT_WRITE_WINDOW = 0.05
+
+# Max registers in one write_registers request
+MAX_WRITE_REGISTERS = 123
+
+class PendingWrite:
+    """ One queued write, and the futures of everyone waiting for it """
+    __slots__ = ("Group", "Key", "Point", "Value", "Registers", "Futures")
+
+    def __init__(self, group, key, point, value, registers:list):
+        self.Group = group
+        self.Key = key
+        self.Point = point
+        self.Value = value
+        self.Registers = registers
+        self.Futures = []
+
+class WriteRun:
+    """ Queued writes to adjacent registers, sent in one request """
+    __slots__ = ("Address", "Registers", "Writes")
+
+    def __init__(self, write:PendingWrite):
+        self.Address = write.Point.Address
+        self.Registers = list(write.Registers)
+        self.Writes = [write]
+
+    @property
+    def Groups(self) -> tuple:
+        return tuple(dict.fromkeys(write.Group for write in self.Writes))
+
+    def append(self, write:PendingWrite) -> bool:
+        # Only extend with the register right after the run
+        if write.Point.Address != self.Address + len(self.Registers):
+            return False
+        if len(self.Registers) + len(write.Registers) > MAX_WRITE_REGISTERS:
+            return False
+        self.Registers.extend(write.Registers)
+        self.Writes.append(write)
+        return True
+
+def compile_write_runs(writes) -> list:
+    """ Merge writes to contiguous registers into runs, in address order """
+    runs = []
+    for write in sorted(writes, key=lambda write: write.Point.Address):
+        if not runs or not runs[-1].append(write):
+            runs.append(WriteRun(write))
+    return runs
+
+def resolve(writes, error):
+    for write in writes:
+        for future in write.Futures:
+            if future.done():
+                continue
+            if error is None:
+                future.set_result(True)
+            else:
+                future.set_exception(error)
+
+class WriteQueue:
+    """ Collects writes arriving within a short window.
+
+    Writes to adjacent holding registers are sent as one write_registers request.
+    Each caller waits for its own future, so it gets the result of the request its
+    write went out in. A second write to the same register within the window
+    replaces the first, and both callers get the result.
+    """
+    def __init__(self, send, window:float = DEFAULT_WRITE_WINDOW):
+        self._send = send           # Coroutine function sending one WriteRun
+        self._window = window
+        self._pending = {}          # Point index -> PendingWrite
+        self._handle = None
+
+    async def write(self, group, key, point, value, registers:list):
+        return await self.enqueue(group, key, point, value, registers)
+
+    def enqueue(self, group, key, point, value, registers:list) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        write = self._pending.get(point.Index)
+        if write is None:
+            write = PendingWrite(group, key, point, value, registers)
+            self._pending[point.Index] = write
+        else:
+            write.Value = value
+            write.Registers = registers
+
+        future = loop.create_future()
+        write.Futures.append(future)
+
+        if self._handle is None:
+            self._handle = loop.call_later(self._window, lambda: asyncio.ensure_future(self.flush()))
+        return future
+
+    async def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        writes = list(self._pending.values())
+        self._pending = {}
+        if not writes:
+            return
+
+        try:
+            for run in compile_write_runs(writes):
+                _LOGGER.debug("Writing %s registers at %s: %s", len(run.Registers), run.Address, [write.Key for write in run.Writes])
+                try:
+                    await self._send(run)
+                except Exception as err:
+                    resolve(run.Writes, err)
+                else:
+                    resolve(run.Writes, None)
+        finally:
+            # Nobody is left waiting if the flush itself is cancelled
+            for write in writes:
+                for future in write.Futures:
+                    future.cancel()
+
+    def cancel(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        for write in self._pending.values():
+            for future in write.Futures:
+                if not future.done():
+                    future.cancel()
+        self._pending = {}
@@ -0,0 +1,105 @@
+"""Rolling window statistics for Swegon datapoints."""
+import logging
+import math
+import time
+
+from array import array
+from collections import deque
+
+_LOGGER = logging.getLogger(__name__)
+
+class RollingWindow:
+    """ Mean, min, max and standard deviation of the samples in the last window seconds.
+
+    Samples are kept in a ring buffer of at most capacity samples. Sums are updated
+    as samples enter and leave the window, and min and max are the heads of
+    monotonic queues, so each sample costs O(1) amortized.
+    """
+    def __init__(self, window:float, capacity:int):
+        self._window = window
+        self._capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._first = 0             # Sequence number of the oldest sample
+        self._next = 0              # Sequence number of the next sample
+        self._shift = 0.0           # Sums are of value - shift, which keeps them small
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._min = deque()         # (sequence, value), increasing values
+        self._max = deque()         # (sequence, value), decreasing values
+
+    def __len__(self) -> int:
+        return self._next - self._first
+
+    def add(self, value:float, now:float | None = None):
+        now = time.monotonic() if now is None else now
+        self.expire(now)
+        if len(self) == self._capacity:
+            self._drop()
+
+        sequence = self._next
+        slot = sequence % self._capacity
+        self._times[slot] = now
+        self._values[slot] = value
+        self._next += 1
+
+        if len(self) == 1:
+            self._shift = value
+        offset = value - self._shift
+        self._sum += offset
+        self._sumsq += offset * offset
+
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((sequence, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((sequence, value))
+
+    def expire(self, now:float):
+        while len(self) and now - self._times[self._first % self._capacity] > self._window:
+            self._drop()
+
+    def _drop(self):
+        # Remove the oldest sample
+        offset = self._values[self._first % self._capacity] - self._shift
+        self._first += 1
+        if self._min and self._min[0][0] < self._first:
+            self._min.popleft()
+        if self._max and self._max[0][0] < self._first:
+            self._max.popleft()
+
+        if len(self) == 0:
+            self._sum = self._sumsq = 0.0
+        else:
+            self._sum -= offset
+            self._sumsq -= offset * offset
+
+    @property
+    def mean(self) -> float | None:
+        count = len(self)
+        if count == 0:
+            return None
+        return self._shift + self._sum / count
+
+    @property
+    def min(self) -> float | None:
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> float | None:
+        return self._max[0][1] if self._max else None
+
+    @property
+    def std(self) -> float | None:
+        count = len(self)
+        if count == 0:
+            return None
+        mean = self._sum / count
+        return math.sqrt(max(0.0, self._sumsq / count - mean * mean))
+
+    def asDict(self, digits:int = 2) -> dict:
+        values = {"mean": self.mean, "min": self.min, "max": self.max, "std_dev": self.std}
+        values = {key: None if value is None else round(value, digits) for key, value in values.items()}
+        values["samples"] = len(self)
+        return values
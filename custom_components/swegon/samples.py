@@ -0,0 +1,34 @@
+"""In-memory sample buffers for Swegon datapoints."""
+import logging
+
+from array import array
+
+_LOGGER = logging.getLogger(__name__)
+
+class SampleBuffer:
+    """ Timestamped samples of one datapoint, the oldest are overwritten when full """
+    __slots__ = ("_capacity", "_times", "_values", "_next")
+
+    def __init__(self, capacity:int):
+        self._capacity = capacity
+        self._times = array('d', bytes(8 * capacity))
+        self._values = array('d', bytes(8 * capacity))
+        self._next = 0              # Samples added, the next one goes in slot _next % capacity
+
+    def __len__(self) -> int:
+        return min(self._next, self._capacity)
+
+    def add(self, timestamp:float, value:float):
+        slot = self._next % self._capacity
+        self._times[slot] = timestamp
+        self._values[slot] = value
+        self._next += 1
+
+    def samples(self, since:float | None = None) -> list:
+        """ [timestamp, value] pairs, oldest first """
+        result = []
+        for sequence in range(self._next - len(self), self._next):
+            slot = sequence % self._capacity
+            if since is None or self._times[slot] >= since:
+                result.append([self._times[slot], self._values[slot]])
+        return result
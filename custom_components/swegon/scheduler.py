@@ -0,0 +1,59 @@
+"""Polling scheduler for Swegon datapoint groups."""
+import logging
+import time
+
+from dataclasses import dataclass
+
+_LOGGER = logging.getLogger(__name__)
+
+@dataclass
+class PollTask:
+    Name: str
+    Groups: tuple                   # Datapoint groups read by this task
+    Interval: float                 # Seconds between polls
+    Adaptive: bool = False          # Adjust interval based on how often values change
+    MinInterval: float = 0
+    MaxInterval: float = 0
+    NextPoll: float = 0             # time.monotonic() when this task is due
+
+class PollScheduler:
+    """ Keeps track of when each group of datapoints should be read.
+
+    Adaptive tasks lengthen their interval while values are stable, and shorten
+    it again when values change.
+    """
+    def __init__(self, tasks, min_factor:float, max_factor:float, grow:float = 1.5, shrink:float = 0.5):
+        self._tasks = tasks
+        self._grow = grow
+        self._shrink = shrink
+
+        for task in self._tasks:
+            task.MinInterval = task.Interval * min_factor if task.Adaptive else task.Interval
+            task.MaxInterval = task.Interval * max_factor if task.Adaptive else task.Interval
+
+    @property
+    def tasks(self):
+        return self._tasks
+
+    def due(self, now:float | None = None) -> list:
+        """ Return tasks that should be read now """
+        now = time.monotonic() if now is None else now
+        return [task for task in self._tasks if task.NextPoll <= now]
+
+    def polled(self, task:PollTask, changed:bool | None, now:float | None = None):
+        """ Reschedule a task after it has been read. changed is None if the read failed, or nothing was read. """
+        now = time.monotonic() if now is None else now
+
+        if task.Adaptive and changed is not None:
+            if changed:
+                task.Interval = max(task.MinInterval, task.Interval * self._shrink)
+            else:
+                task.Interval = min(task.MaxInterval, task.Interval * self._grow)
+            _LOGGER.debug("Poll interval for %s: %.0f s", task.Name, task.Interval)
+
+        task.NextPoll = now + task.Interval
+
+    def next_due(self, now:float | None = None, default:float = 0) -> float:
+        """ Seconds until the next task is due, default if there are no tasks """
+        now = time.monotonic() if now is None else now
+        return max(0, min((task.NextPoll for task in self._tasks), default=now + default) - now)
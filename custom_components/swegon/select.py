@@ -59,7 +59,7 @@ class SwegonSelectEntity(SwegonBaseEntity, SelectEntity):
                 optionIndex = self.coordinator.config_selection
                 option = self._options[optionIndex]
             else:
-                optionIndex = self.coordinator.get_value(self._group, self._key)
+                optionIndex = self._value()
                 option = self._options[optionIndex]
         except Exception as e:
             option = "Unknown"
@@ -2,55 +2,85 @@ import logging
 
 from collections import namedtuple
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
-from homeassistant.const import CONF_DEVICES, PERCENTAGE, TEMPERATURE, CONCENTRATION_PARTS_PER_MILLION
-from homeassistant.const import UnitOfPressure, UnitOfTemperature, UnitOfVolumeFlowRate
+from homeassistant.const import CONF_DEVICES, PERCENTAGE, REVOLUTIONS_PER_MINUTE, TEMPERATURE, CONCENTRATION_PARTS_PER_MILLION
+from homeassistant.const import UnitOfEnergy, UnitOfPower, UnitOfPressure, UnitOfTemperature, UnitOfTime, UnitOfVolumeFlowRate
 from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN
 from homeassistant.helpers.entity import EntityCategory
 
-from .const import DOMAIN, CONF_IP
+from .const import DOMAIN, CONF_IP, DIAGNOSTICS, STATISTICS
 from .entity import SwegonBaseEntity
 
 _LOGGER = logging.getLogger(__name__)
 
-DATA_TYPE = namedtuple('DataType', ['units', 'deviceClass', 'category', 'icon'])
+DATA_TYPE = namedtuple('DataType', ['units', 'deviceClass', 'category', 'icon', 'stateClass'], defaults=(None,))
 DATA_TYPES = {}
 DATA_TYPES["co2"] = DATA_TYPE(CONCENTRATION_PARTS_PER_MILLION, SensorDeviceClass.CO2, None, None)
 DATA_TYPES["flow"] = DATA_TYPE(UnitOfVolumeFlowRate.CUBIC_METERS_PER_HOUR, None, None, "mdi:weather-windy")
 DATA_TYPES["humidity"] = DATA_TYPE(PERCENTAGE, SensorDeviceClass.HUMIDITY, None, None)
 DATA_TYPES["humidity_abs"] = DATA_TYPE("g/m³", None, None, None)
 DATA_TYPES["percent"] = DATA_TYPE(PERCENTAGE, None, None, None)
+DATA_TYPES["rpm"] = DATA_TYPE(REVOLUTIONS_PER_MINUTE, None, None, "mdi:fan")
+DATA_TYPES["state"] = DATA_TYPE(None, None, None, "mdi:state-machine")
+DATA_TYPES["power"] = DATA_TYPE(UnitOfPower.WATT, SensorDeviceClass.POWER, None, None, SensorStateClass.MEASUREMENT)
+DATA_TYPES["energy"] = DATA_TYPE(UnitOfEnergy.KILO_WATT_HOUR, SensorDeviceClass.ENERGY, None, None, SensorStateClass.TOTAL_INCREASING)
+DATA_TYPES["sfp"] = DATA_TYPE("kW/(m³/s)", None, None, "mdi:fan-chevron-up", SensorStateClass.MEASUREMENT)
 DATA_TYPES["pressure"] = DATA_TYPE(UnitOfPressure.PA, SensorDeviceClass.PRESSURE, None, None)
 DATA_TYPES["temperature"] = DATA_TYPE(UnitOfTemperature.CELSIUS, SensorDeviceClass.TEMPERATURE, None, None)
 DATA_TYPES["voc"] = DATA_TYPE(CONCENTRATION_PARTS_PER_MILLION, SensorDeviceClass.VOLATILE_ORGANIC_COMPOUNDS_PARTS, None, None)
+DATA_TYPES["diag_duration"] = DATA_TYPE(UnitOfTime.MILLISECONDS, SensorDeviceClass.DURATION, EntityCategory.DIAGNOSTIC, "mdi:timer-outline")
+DATA_TYPES["diag_duration_us"] = DATA_TYPE(UnitOfTime.MICROSECONDS, SensorDeviceClass.DURATION, EntityCategory.DIAGNOSTIC, "mdi:timer-outline")
+DATA_TYPES["diag_count"] = DATA_TYPE(None, None, EntityCategory.DIAGNOSTIC, "mdi:counter")
+DATA_TYPES["diag_state"] = DATA_TYPE(None, None, EntityCategory.DIAGNOSTIC, "mdi:lan-connect")
 
-SwegonEntity = namedtuple('SwegonEntity', ['group', 'key', 'entityName', 'data_type'])
+SwegonEntity = namedtuple('SwegonEntity', ['group', 'key', 'entityName', 'data_type', 'enabled'], defaults=(True,))
 ENTITIES = [
     SwegonEntity("Sensors", "Fresh_Temp", "Fresh Air Temp", DATA_TYPES["temperature"]),
     SwegonEntity("Sensors", "Supply_Temp1", "Supply Temp before re-heater", DATA_TYPES["temperature"]),
     SwegonEntity("Sensors", "Supply_Temp2", "Supply Temp", DATA_TYPES["temperature"]),
     SwegonEntity("Sensors", "Extract_Temp", "Extract Temp", DATA_TYPES["temperature"]),
     SwegonEntity("Sensors", "Exhaust_Temp", "Exhaust Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "Room_Temp", "Room Air Temp", DATA_TYPES["temperature"]),
+    SwegonEntity("Sensors", "Room_Temp", "Room Air Temp", DATA_TYPES["temperature"], False),
     SwegonEntity("Sensors", "UP1_Temp", "User Panel 1 Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "UP2_Temp", "User Panel 2 Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "WR_Temp", "Water Radiator Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "PreHeat_Temp", "Pre-Heater Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "ExtFresh_Temp", "External Fresh Air Temp", DATA_TYPES["temperature"]),
-    #SwegonEntity("Sensors", "C02_Unf", "CO2 Unfiltered", DATA_TYPES["co2"]),
-    #SwegonEntity("Sensors", "CO2_Fil", "CO2 Filtered", DATA_TYPES["co2"]),
+    SwegonEntity("Sensors", "UP2_Temp", "User Panel 2 Temp", DATA_TYPES["temperature"], False),
+    SwegonEntity("Sensors", "WR_Temp", "Water Radiator Temp", DATA_TYPES["temperature"], False),
+    SwegonEntity("Sensors", "PreHeat_Temp", "Pre-Heater Temp", DATA_TYPES["temperature"], False),
+    SwegonEntity("Sensors", "ExtFresh_Temp", "External Fresh Air Temp", DATA_TYPES["temperature"], False),
+    SwegonEntity("Sensors", "C02_Unf", "CO2 Unfiltered", DATA_TYPES["co2"], False),
+    SwegonEntity("Sensors", "CO2_Fil", "CO2 Filtered", DATA_TYPES["co2"], False),
     SwegonEntity("Sensors", "RH", "Relative Humidity", DATA_TYPES["humidity"]),
     SwegonEntity("Sensors", "AH", "Absolute Humidity", DATA_TYPES["humidity_abs"]),
-    #SwegonEntity("Sensors", "AH_SP", "Absolute Humidity SP", DATA_TYPES["humidity_abs"]),
-    #SwegonEntity("Sensors", "VOC", "VOC", DATA_TYPES["voc"]),
-    #SwegonEntity("Sensors", "Supply_Pressure", "Supply Pressure", DATA_TYPES["pressure"]),
-    #SwegonEntity("Sensors", "Exhaust_Pressure", "Exhaust Pressure", DATA_TYPES["pressure"]),
-    #SwegonEntity("Sensors", "Supply_Flow", "Supply Flow", DATA_TYPES["flow"]),
-    #SwegonEntity("Sensors", "Exhaust_Flow", "Exhaust Flow", DATA_TYPES["flow"]),
+    SwegonEntity("Sensors", "AH_SP", "Absolute Humidity SP", DATA_TYPES["humidity_abs"], False),
+    SwegonEntity("Sensors", "VOC", "VOC", DATA_TYPES["voc"], False),
+    SwegonEntity("Sensors", "Supply_Pressure", "Supply Pressure", DATA_TYPES["pressure"], False),
+    SwegonEntity("Sensors", "Exhaust_Pressure", "Exhaust Pressure", DATA_TYPES["pressure"], False),
+    SwegonEntity("Sensors", "Supply_Flow", "Supply Flow", DATA_TYPES["flow"], False),
+    SwegonEntity("Sensors", "Exhaust_Flow", "Exhaust Flow", DATA_TYPES["flow"], False),
     SwegonEntity("Sensors2", "Heat_Exchanger", "Heat Exchanger", DATA_TYPES["percent"]),
+    SwegonEntity("UnitStatuses", "Unit_state", "Unit State", DATA_TYPES["state"], False),
+    SwegonEntity("UnitStatuses", "Speed_state", "Speed State", DATA_TYPES["state"], False),
     SwegonEntity("UnitStatuses", "Supply_Fan", "Supply Fan", DATA_TYPES["percent"]),
     SwegonEntity("UnitStatuses", "Exhaust_Fan", "Exhaust Fan", DATA_TYPES["percent"]),
+    SwegonEntity("UnitStatuses", "Supply_Fan_RPM", "Supply Fan Speed", DATA_TYPES["rpm"], False),
+    SwegonEntity("UnitStatuses", "Exhaust_Fan_RPM", "Exhaust Fan Speed", DATA_TYPES["rpm"], False),
+    SwegonEntity("UnitStatuses", "Temp_SP2", "Temperature Setpoint in Use", DATA_TYPES["temperature"], False),
     SwegonEntity("UnitStatuses", "Heating_Output", "Heating Output", DATA_TYPES["percent"]),
     SwegonEntity("VirtualSensors", "Efficiency", "Efficiency", DATA_TYPES["percent"]),
+    SwegonEntity("VirtualSensors", "Recovered_Heat", "Recovered Heat", DATA_TYPES["power"]),
+    SwegonEntity("VirtualSensors", "Recovered_Energy", "Recovered Energy", DATA_TYPES["energy"]),
+    SwegonEntity("VirtualSensors", "Specific_Fan_Power", "Specific Fan Power", DATA_TYPES["sfp"], False),
+    SwegonEntity("Statistics", "Efficiency", "Efficiency Average", DATA_TYPES["percent"], False),
+    SwegonEntity("Statistics", "Supply_Temp2", "Supply Temp Average", DATA_TYPES["temperature"], False),
+    SwegonEntity("Statistics", "RH", "Relative Humidity Average", DATA_TYPES["humidity"], False),
+    SwegonEntity("Statistics", "CO2", "CO2 Average", DATA_TYPES["co2"], False),
+    SwegonEntity("Diagnostics", "Health", "Connection State", DATA_TYPES["diag_state"]),
+    SwegonEntity("Diagnostics", "Errors", "Modbus Errors", DATA_TYPES["diag_count"]),
+    SwegonEntity("Diagnostics", "Timeouts", "Modbus Timeouts", DATA_TYPES["diag_count"], False),
+    SwegonEntity("Diagnostics", "Reconnects", "Modbus Reconnects", DATA_TYPES["diag_count"], False),
+    SwegonEntity("Diagnostics", "Transactions", "Modbus Transactions", DATA_TYPES["diag_count"], False),
+    SwegonEntity("Diagnostics", "Latency_Mean", "Modbus Latency", DATA_TYPES["diag_duration"], False),
+    SwegonEntity("Diagnostics", "Latency_P95", "Modbus Latency 95th Percentile", DATA_TYPES["diag_duration"], False),
+    SwegonEntity("Diagnostics", "Cycle_Duration", "Poll Cycle Duration", DATA_TYPES["diag_duration"], False),
+    SwegonEntity("Diagnostics", "Decode_Time", "Decode Time", DATA_TYPES["diag_duration_us"], False),
 ]
 
 async def async_setup_entry(hass, config_entry, async_add_devices):
@@ -77,9 +107,22 @@ class SwegonSensorEntity(SwegonBaseEntity, SensorEntity):
         """Sensor Entity properties"""
         self._attr_device_class = swegonentity.data_type.deviceClass
         self._attr_native_unit_of_measurement = swegonentity.data_type.units
+        self._attr_state_class = swegonentity.data_type.stateClass
+        self._attr_entity_registry_enabled_default = swegonentity.enabled
+
+    @property
+    def available(self) -> bool:
+        # Diagnostics are kept by the coordinator, and also shown while the unit is not responding
+        return self._group == DIAGNOSTICS or super().available
+
+    @property
+    def extra_state_attributes(self):
+        # Min, max and standard deviation over the same window as the average
+        if self._group == STATISTICS:
+            return self.coordinator.get_statistics(self._key)
+        return super().extra_state_attributes
 
     @property
     def native_value(self):
         """Return the value of the sensor."""
-        val = self.coordinator.get_value(self._group, self._key)
-        return val
+        return self._value()
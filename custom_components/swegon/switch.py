@@ -42,7 +42,7 @@ class SwegonSwitchEntity(SwegonBaseEntity, SwitchEntity):
     @property
     def is_on(self):
         """Return the state of the switch."""
-        return self.coordinator.get_value(self._group, self._key)
+        return self._value()
 
     async def async_turn_on(self, **kwargs):
         await self.writeValue(1)
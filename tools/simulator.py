@@ -0,0 +1,360 @@
+""" Simulated Swegon CASA unit(s) served over Modbus TCP.
+
+The register layout is taken from the same device definitions as the integration
+uses. Run it with:
+
+    python tools/simulator.py --port 5020 --units 1-10
+
+and point the integration (or the benchmarks) to that host and port.
+"""
+from array import array
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from custom_components.swegon.pyswegon.datastore import DatapointStore
+from custom_components.swegon.pyswegon.readplan import compile_read_plan
+from custom_components.swegon.pyswegon.swegon import COMMANDS,SETPOINTS,DEVICE_INFO,ALARMS,SENSORS,SENSORS2,UNIT_STATUSES,CONFIG
+from custom_components.swegon.pyswegon.swegon import MODE_INPUT, MODE_HOLDING, get_register_map, list_models
+
+_LOGGER = logging.getLogger(__name__)
+
+# Modbus function codes and exception codes
+FC_READ_HOLDING = 3
+FC_READ_INPUT = 4
+FC_WRITE_SINGLE = 6
+FC_WRITE_MULTIPLE = 16
+EX_ILLEGAL_FUNCTION = 1
+EX_ILLEGAL_ADDRESS = 2
+EX_ILLEGAL_VALUE = 3
+EX_DEVICE_FAILURE = 4
+EX_GATEWAY_NO_RESPONSE = 11
+
+# Fan speed for Op_Mode: stopped, away, home, boost, travel
+OP_MODE_SPEEDS = {1: ("Away_Supply_Speed", "Away_Exhaust_Speed"), 2: ("Home_Supply_Speed", "Home_Exhaust_Speed"), 3: ("Boost_Supply_Speed", "Boost_Exhaust_Speed"), 4: ("Home_Supply_Speed", "Home_Exhaust_Speed")}
+
+class SimulatedUnit:
+    """ One ventilation unit, with registers kept in a DatapointStore """
+    def __init__(self, device_module:str, slave_id:int, outdoor_temp:float = 5.0, rng:random.Random | None = None):
+        self.SlaveId = slave_id
+        self.Map = get_register_map(device_module)
+        self.Store = DatapointStore(self.Map)
+        self._rng = rng or random.Random()
+        self._outdoor = outdoor_temp
+        self._start = time.monotonic()
+        self._byAddress = self.Map.Addresses
+
+        # Device info
+        self.set(DEVICE_INFO, "FW_Maj", 2)
+        self.set(DEVICE_INFO, "FW_Min", 4)
+        self.set(DEVICE_INFO, "FW_Build", 1)
+        self.set(DEVICE_INFO, "Par_Maj", 1)
+        self.set(DEVICE_INFO, "Model_Name", device_module)
+        self.set(DEVICE_INFO, "Serial_Number", "SIM{:06d}".format(slave_id))
+
+        # Defaults
+        self.set(COMMANDS, "Op_Mode", 2)
+        self.set(SETPOINTS, "Temp_SP", 18)
+        self.set(SENSORS2, "Heat_Exchanger", 100)
+        for key, value in (("Travelling_Mode_Speed_Drop", 20), ("Fireplace_Run_Time", 15), ("Fireplace_Max_Speed_Difference", 25),
+                           ("Away_Supply_Speed", 30), ("Away_Exhaust_Speed", 30), ("Home_Supply_Speed", 50),
+                           ("Home_Exhaust_Speed", 50), ("Boost_Supply_Speed", 90), ("Boost_Exhaust_Speed", 90)):
+            self.set(CONFIG, key, value)
+        self.set(SENSORS, "Extract_Temp", 21.5)
+        self.set(SENSORS, "RH", 40)
+        self.set(SENSORS, "CO2_Fil", 550)
+        self.set(UNIT_STATUSES, "Supply_Fan", self.get(CONFIG, "Home_Supply_Speed"))
+        self.set(UNIT_STATUSES, "Exhaust_Fan", self.get(CONFIG, "Home_Exhaust_Speed"))
+        self.step(0)
+
+    def get(self, group, key):
+        return self.Store.get(self.Map.Groups[group][key])
+
+    def set(self, group, key, value):
+        point = self.Map.Groups.get(group, {}).get(key)
+        if point is not None:
+            self.Store.set(point, value)
+
+    def _drift(self, group, key, target, rate, noise, dt):
+        value = self.get(group, key)
+        value += (target - value) * min(1, rate * dt) + self._rng.gauss(0, noise) * math.sqrt(dt)
+        self.set(group, key, value)
+        return value
+
+    def step(self, dt:float):
+        """ Move the simulated unit dt seconds forward """
+        t = time.monotonic() - self._start
+
+        # Fans move towards the speed for the current mode
+        mode = self.get(COMMANDS, "Op_Mode")
+        supply_target, exhaust_target = 0, 0
+        if mode in OP_MODE_SPEEDS:
+            supply_key, exhaust_key = OP_MODE_SPEEDS[mode]
+            supply_target, exhaust_target = self.get(CONFIG, supply_key), self.get(CONFIG, exhaust_key)
+            if mode == 4 or self.get(COMMANDS, "Travelling_Mode"):
+                drop = self.get(CONFIG, "Travelling_Mode_Speed_Drop")
+                supply_target, exhaust_target = supply_target - drop, exhaust_target - drop
+            if self.get(COMMANDS, "Fireplace_Mode"):
+                exhaust_target -= self.get(CONFIG, "Fireplace_Max_Speed_Difference")
+        supply = self._fan("Supply", max(0, supply_target), dt)
+        exhaust = self._fan("Exhaust", max(0, exhaust_target), dt)
+        self.set(UNIT_STATUSES, "Unit_state", 0 if mode == 0 else 1)
+        self.set(UNIT_STATUSES, "Speed_state", mode)
+
+        # Temperatures
+        fresh = self._outdoor + 3 * math.sin(2 * math.pi * t / 600) + self._rng.gauss(0, 0.05)
+        self.set(SENSORS, "Fresh_Temp", fresh)
+        extract = self._drift(SENSORS, "Extract_Temp", 21.5, 0.01, 0.05, dt)
+        efficiency = 0.8 * self.get(SENSORS2, "Heat_Exchanger") / 100 if supply > 0 else 0
+        supply1 = fresh + efficiency * (extract - fresh)
+        setpoint = self.get(SETPOINTS, "Temp_SP")
+        heating = min(100, max(0, (setpoint - supply1) * 20)) if supply > 0 else 0
+        self.set(SENSORS, "Supply_Temp1", supply1)
+        self.set(SENSORS, "Supply_Temp2", max(supply1, supply1 + (setpoint - supply1) * heating / 100))
+        self.set(SENSORS, "Exhaust_Temp", extract - efficiency * (extract - fresh) * 0.9)
+        self.set(SENSORS, "Room_Temp", extract - 0.5)
+        self.set(SENSORS, "UP1_Temp", extract - 0.3)
+        self.set(UNIT_STATUSES, "Heating_Output", round(heating))
+        self.set(UNIT_STATUSES, "Temp_SP2", round(setpoint))
+
+        # Air quality
+        self.set(SENSORS, "RH", round(min(90, max(15, self._drift(SENSORS, "RH", 40, 0.01, 0.5, dt)))))
+        co2 = self._drift(SENSORS, "CO2_Fil", 900 - 5 * supply, 0.02, 5, dt)
+        self.set(SENSORS, "C02_Unf", round(co2 + self._rng.gauss(0, 20)))
+        self.set(SENSORS, "CO2_Fil", round(co2))
+        self.set(SENSORS, "AH", 6.5 + self._rng.gauss(0, 0.1))
+        self.set(SENSORS, "Supply_Flow", supply * 1.2 * 3.6)
+        self.set(SENSORS, "Exhaust_Flow", exhaust * 1.2 * 3.6)
+        self.set(SENSORS, "Supply_Pressure", round(supply * 1.5))
+        self.set(SENSORS, "Exhaust_Pressure", round(exhaust * 1.5))
+
+        # Alarms
+        active = any(point.Key != "Active_Alarms" and self.Store.get(point) for point in self.Map.Groups[ALARMS].values())
+        self.set(ALARMS, "Active_Alarms", 1 if active else 0)
+
+    def _fan(self, name, target, dt):
+        value = self.get(UNIT_STATUSES, name + "_Fan")
+        value = round(value + (target - value) * min(1, 0.2 * dt))
+        self.set(UNIT_STATUSES, name + "_Fan", value)
+        self.set(UNIT_STATUSES, name + "_Fan_RPM", value * 30)
+        return value
+
+    def injectAlarm(self, key:str | None = None):
+        """ Raise an alarm, a random one if key is None """
+        keys = [k for k in self.Map.Groups[ALARMS] if k != "Active_Alarms"]
+        key = key or self._rng.choice(keys)
+        _LOGGER.info("Unit %s: injecting alarm %s", self.SlaveId, key)
+        self.set(ALARMS, key, 1)
+        self.set(ALARMS, "Active_Alarms", 1)
+
+    def resetAlarms(self):
+        for point in self.Map.Groups[ALARMS].values():
+            self.Store.set(point, 0)
+
+    def _region(self, mode, address, count):
+        if mode not in self.Map.Regions:
+            return None
+        first, last, offset = self.Map.Regions[mode]
+        if address < first or address + count > last:
+            return None
+        return offset + address
+
+    def readRegisters(self, mode, address, count):
+        slot = self._region(mode, address, count)
+        if slot is None:
+            return None
+        return self.Store.Raw[slot:slot+count]
+
+    def writeRegisters(self, address, values) -> bool:
+        slot = self._region(MODE_HOLDING, address, len(values))
+        if slot is None:
+            return False
+
+        points = [point for (mode, a), point in self._byAddress.items() if mode == MODE_HOLDING and address <= a < address + len(values)]
+        if not points:
+            return False
+        self.Store.Raw[slot:slot+len(values)] = array('H', values)
+
+        # Decode written values again, and act on commands
+        for block in compile_read_plan(points, 0):
+            self.Map.compileBlock(block)
+            self.Store.scatter(block, self.Store.Raw[block.Slot:block.Slot+block.Count])
+        if self.get(CONFIG, "Reset_Alarms"):
+            self.resetAlarms()
+            self.set(CONFIG, "Reset_Alarms", 0)
+        return True
+
+class SwegonSimulator:
+    """ Modbus TCP server for one or more simulated units.
+
+    latency and jitter are in seconds. loss is the probability that a request is
+    never answered, and error_rate the probability of a device failure response.
+    """
+    def __init__(self, device_module:str = "CASA R4", host:str = "127.0.0.1", port:int = 5020, slave_ids=(1,),
+                 latency:float = 0.0, jitter:float = 0.0, loss:float = 0.0, error_rate:float = 0.0,
+                 alarm_rate:float = 0.0, seed:int | None = None):
+        self.Host = host
+        self.Port = port
+        self.Latency = latency
+        self.Jitter = jitter
+        self.Loss = loss
+        self.ErrorRate = error_rate
+        self.AlarmRate = alarm_rate
+        self._rng = random.Random(seed)
+        self.Units = {slave_id: SimulatedUnit(device_module, slave_id, rng=self._rng) for slave_id in slave_ids}
+
+        # Statistics
+        self.Requests = 0
+        self.BytesIn = 0
+        self.BytesOut = 0
+
+        self._server = None
+        self._dynamics = None
+        self._clients = {}
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_client, self.Host, self.Port)
+        if self.Port == 0:
+            self.Port = self._server.sockets[0].getsockname()[1]
+        self._dynamics = asyncio.create_task(self._run_dynamics())
+        _LOGGER.info("Simulating %s unit(s) on %s:%s", len(self.Units), self.Host, self.Port)
+
+    async def stop(self):
+        if self._dynamics is not None:
+            self._dynamics.cancel()
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._clients):
+                writer.close()
+            await asyncio.gather(*self._clients.values(), return_exceptions=True)
+            await self._server.wait_closed()
+
+    async def _run_dynamics(self):
+        last = time.monotonic()
+        while True:
+            await asyncio.sleep(1)
+            now = time.monotonic()
+            for unit in self.Units.values():
+                unit.step(now - last)
+                if self.AlarmRate and self._rng.random() < self.AlarmRate * (now - last):
+                    unit.injectAlarm()
+            last = now
+
+    async def _handle_client(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+        self._clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                header = await reader.readexactly(7)
+                tid, pid, length, unit = struct.unpack('>HHHB', header)
+                pdu = await reader.readexactly(length - 1)
+                self.Requests += 1
+                self.BytesIn += 7 + len(pdu)
+
+                # Requests are answered independently, so pipelined requests work
+                task = asyncio.create_task(self._respond(writer, lock, tid, unit, pdu))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._clients.pop(writer, None)
+            writer.close()
+
+    async def _respond(self, writer, lock, tid, unit, pdu):
+        delay = self.Latency + self._rng.uniform(0, self.Jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self.Loss and self._rng.random() < self.Loss:
+            return
+
+        response = self.process(unit, pdu)
+        async with lock:
+            writer.write(struct.pack('>HHHB', tid, 0, len(response) + 1, unit) + response)
+            self.BytesOut += 7 + len(response)
+            await writer.drain()
+
+    def process(self, unit_id:int, pdu:bytes) -> bytes:
+        """ Handle one request PDU and return the response PDU """
+        fc = pdu[0]
+        unit = self.Units.get(unit_id)
+        if unit is None:
+            return bytes((fc | 0x80, EX_GATEWAY_NO_RESPONSE))
+        if self.ErrorRate and self._rng.random() < self.ErrorRate:
+            return bytes((fc | 0x80, EX_DEVICE_FAILURE))
+
+        if fc in (FC_READ_HOLDING, FC_READ_INPUT):
+            address, count = struct.unpack('>HH', pdu[1:5])
+            if not 1 <= count <= 125:
+                return bytes((fc | 0x80, EX_ILLEGAL_VALUE))
+            registers = unit.readRegisters(MODE_HOLDING if fc == FC_READ_HOLDING else MODE_INPUT, address, count)
+            if registers is None:
+                return bytes((fc | 0x80, EX_ILLEGAL_ADDRESS))
+            return struct.pack('>BB{}H'.format(count), fc, 2 * count, *registers)
+
+        if fc == FC_WRITE_SINGLE:
+            address, value = struct.unpack('>HH', pdu[1:5])
+            if not unit.writeRegisters(address, [value]):
+                return bytes((fc | 0x80, EX_ILLEGAL_ADDRESS))
+            return pdu[:5]
+
+        if fc == FC_WRITE_MULTIPLE:
+            address, count, _ = struct.unpack('>HHB', pdu[1:6])
+            values = list(struct.unpack('>{}H'.format(count), pdu[6:6 + 2 * count]))
+            if not unit.writeRegisters(address, values):
+                return bytes((fc | 0x80, EX_ILLEGAL_ADDRESS))
+            return pdu[:5]
+
+        return bytes((fc | 0x80, EX_ILLEGAL_FUNCTION))
+
+def parse_units(text:str) -> list:
+    # "1", "1,3,5" or "1-10"
+    units = []
+    for part in text.split(','):
+        if '-' in part:
+            first, last = part.split('-')
+            units.extend(range(int(first), int(last) + 1))
+        else:
+            units.append(int(part))
+    return units
+
+async def main(args):
+    simulator = SwegonSimulator(args.model, args.host, args.port, parse_units(args.units), args.latency, args.jitter,
+                                args.loss, args.error_rate, args.alarm_rate, args.seed)
+    await simulator.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await simulator.stop()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulated Swegon CASA unit(s) over Modbus TCP")
+    parser.add_argument("--model", default="CASA R4", choices=list(list_models()))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5020)
+    parser.add_argument("--units", default="1", help="Slave ids, e.g. 1 or 1-10")
+    parser.add_argument("--latency", type=float, default=0.0, help="Response delay in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random extra delay in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="Probability that a request is not answered")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of an error response")
+    parser.add_argument("--alarm-rate", type=float, default=0.0, help="Alarms raised per unit per second")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        pass